@@ -1,35 +1,419 @@
-import urllib.request, json
+import asyncio
+import functools
+import hashlib
+import http.client
+import os
+import re
+import shelve
+import socket
+import ssl
+import sys
+import tempfile
+import zlib
+from types import MappingProxyType
 
-query = 'chair'
-from urllib.parse import quote
-sort_param = 'popularity desc'.replace(' ', '%20')
-base = ('https://embed-3dwarehouse.sketchup.com/warehouse/v1.0/entities'
-    f'?sortBy={sort_param}&personalizeSearch=false'
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+
+_WS = b' \t\r\n'
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+
+
+def _string_end(buf, i):
+    # Index of the quote closing the string that opens at buf[i]
+    j = i + 1
+    while True:
+        j = buf.find(b'"', j)
+        if j < 0:
+            return -1
+        k = j
+        while buf[k - 1] == 0x5c:  # count preceding backslashes
+            k -= 1
+        if (j - k) % 2 == 0:
+            return j
+        j += 1
+
+
+def _skip_ws(buf, i):
+    n = len(buf)
+    while i < n and buf[i] in _WS:
+        i += 1
+    return i
+
+
+def _skip_value(buf, i):
+    # Index just past the JSON value starting at buf[i], or -1
+    i = _skip_ws(buf, i)
+    if i >= len(buf):
+        return -1
+    c = buf[i]
+    if c == 0x22:  # "
+        end = _string_end(buf, i)
+        return end + 1 if end >= 0 else -1
+    if c not in b'{[':
+        # Scalars cannot contain these, so the next one ends the value
+        ends = [e for e in (buf.find(b',', i), buf.find(b'}', i)) if e >= 0]
+        return min(ends) if ends else -1
+    depth = 0
+    while True:
+        m = _STRUCTURAL.search(buf, i)
+        if m is None:
+            return -1
+        i = m.start()
+        c = buf[i]
+        if c == 0x22:
+            i = _string_end(buf, i)
+            if i < 0:
+                return -1
+        elif c in b'{[':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+
+
+def scan_top_keys(buf):
+    """Top-level object keys read straight off the raw bytes.
+
+    Values are skipped by bracket matching without being decoded, so no
+    Python objects are built for them. Returns None when the buffer does
+    not look like a well formed object so the caller can fall back to a
+    real parser.
+    """
+    i = _skip_ws(buf, 0)
+    if i >= len(buf) or buf[i] != 0x7b:  # {
+        return None
+    keys = []
+    i = _skip_ws(buf, i + 1)
+    if i < len(buf) and buf[i] == 0x7d:
+        return keys if _skip_ws(buf, i + 1) == len(buf) else None
+    while True:
+        if i >= len(buf) or buf[i] != 0x22:
+            return None
+        end = _string_end(buf, i)
+        if end < 0:
+            return None
+        # Decode just the key itself (the body is never decoded as a
+        # whole); escaped keys are rare, let the JSON decoder unescape them
+        key = buf[i + 1:end]
+        keys.append(_json.loads(buf[i:end + 1]) if b'\\' in key
+                    else key.decode('utf-8'))
+        i = _skip_ws(buf, end + 1)
+        if i >= len(buf) or buf[i] != 0x3a:  # :
+            return None
+        i = _skip_value(buf, i + 1)
+        if i < 0:
+            return None
+        i = _skip_ws(buf, i)
+        if i >= len(buf):
+            return None
+        if buf[i] == 0x7d:
+            # Anything but whitespace after the object is not valid JSON
+            return keys if _skip_ws(buf, i + 1) == len(buf) else None
+        if buf[i] != 0x2c:  # ,
+            return None
+        i = _skip_ws(buf, i + 1)
+
+
+# blake2b digest of a body -> its top keys. Hashing runs far faster than
+# any parse, so a byte-identical page (e.g. a 304 replay) is never re-parsed.
+_KEYS_CACHE = {}
+
+
+def top_keys(body):
+    digest = hashlib.blake2b(body, digest_size=16).digest()
+    keys = _KEYS_CACHE.get(digest)
+    if keys is None:
+        keys = _KEYS_CACHE[digest] = _parse_top_keys(body)
+    return keys
+
+
+def _parse_top_keys(body):
+    keys = scan_top_keys(body)
+    if keys is not None:
+        return keys
+    # Only the top-level key list is printed, so let simdjson's lazy
+    # document skip materializing the values when it is available.
+    if simdjson is not None:
+        doc = simdjson.Parser().parse(body)
+        return list(doc.keys()) if isinstance(doc, simdjson.Object) else type(doc)
+    data = _json.loads(body)
+    return list(data.keys()) if isinstance(data, dict) else type(data)
+
+
+HOST = 'embed-3dwarehouse.sketchup.com'
+PAGE_SIZE = 24
+# > 1 fetches that many pages concurrently (needs aiohttp); set with
+# SKP_WH_PAGES or the first command line argument
+PAGES = int(os.environ.get('SKP_WH_PAGES', '1'))
+PATH_PREFIX = ('/warehouse/v1.0/entities'
+    '?sortBy=popularity%20desc&personalizeSearch=false'
     '&contentType=3dw&showBinaryAttributes=true&showBinaryMetadata=true&showAttributes=true'
     '&show=all&recordEvent=false&fq=binaryNames%3Dexists%3Dtrue')
-api_url = f"{base}&q={quote(query)}&offset=0"
-print('Testing URL:', api_url)
-headers = {
+PATH_TMPL = PATH_PREFIX + '&q={q}&offset={offset}'
+
+# Byte -> percent-encoded text, same output as urllib.parse.quote (safe='/')
+_SAFE = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+                  b'0123456789_.-~/')
+_QUOTED = tuple(chr(b) if b in _SAFE else '%%%02X' % b for b in range(256))
+
+
+def fast_quote(text):
+    return ''.join(map(_QUOTED.__getitem__, text.encode('utf-8')))
+
+
+def build_path(query, offset):
+    # Request path of one search page on HOST
+    return PATH_TMPL.format(q=fast_quote(query), offset=offset)
+
+
+try:
+    # Built by setup.py build_ext alongside the sketchup module
+    from warehouse_query import quote as fast_quote, scan_top_keys, build_url
+    build_path = functools.partial(build_url, PATH_PREFIX)
+except ImportError:
+    pass
+
+
+# Upper bound for a (decoded) response body so a misbehaving server cannot
+# make us buffer an arbitrary amount of data.
+MAX_BODY = 8 << 20
+
+# Read-only so every request shares it; the conditional headers are merged
+# into a copy per request.
+HEADERS = MappingProxyType({
     'User-Agent': 'Mozilla/5.0',
     'Accept': 'application/json',
     'Referer': 'https://3dwarehouse.sketchup.com/',
-}
-req = urllib.request.Request(api_url, headers=headers)
-try:
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        raw = resp.read().decode('utf-8', errors='replace')
-        print('Status:', resp.status)
-        print('Length:', len(raw))
-        try:
-            data = json.loads(raw)
-            print('Top keys:', list(data.keys()) if isinstance(data, dict) else type(data))
-        except Exception as e:
-            print('JSON parse failed:', e)
-except Exception as e:
-    print('Request failed:', type(e).__name__, e)
-    if hasattr(e, 'code'):
+    'Accept-Encoding': 'gzip',
+    'Connection': 'keep-alive',
+})
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve(host, port):
+    # Resolve once per process; reconnects go straight to the cached address
+    return socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0][4][:2]
+
+
+class ResumingHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection that reuses the cached address and TLS session"""
+    _context_shared = ssl.create_default_context()
+    _tls_session = None
+
+    def __init__(self, host, **kwargs):
+        kwargs.setdefault('context', self._context_shared)
+        super().__init__(host, **kwargs)
+
+    def connect(self):
+        sock = socket.create_connection(_resolve(self.host, self.port),
+                                        self.timeout, self.source_address)
+        # SNI and certificate checks still use the real host name
+        self.sock = self._context.wrap_socket(
+            sock, server_hostname=self.host,
+            session=ResumingHTTPSConnection._tls_session)
+
+    def close(self):
+        # TLS 1.3 tickets arrive after the handshake, so remember the
+        # session on the way out rather than right after connect().
+        if self.sock is not None and self.sock.session is not None:
+            ResumingHTTPSConnection._tls_session = self.sock.session
+        super().close()
+
+
+# One keep-alive connection shared by every request so paging through
+# offsets pays the TCP + TLS handshake only once.
+_conn = ResumingHTTPSConnection(HOST, timeout=30)
+
+# Prefer an HTTP/2 client when httpx (with h2) is installed: requests for
+# several pages are multiplexed over a single TLS connection.
+_client = None
+if httpx is not None:
+    try:
+        _client = httpx.Client(
+            http2=True, timeout=30,
+            # Connection headers are not allowed in HTTP/2
+            headers={k: v for k, v in HEADERS.items() if k != 'Connection'},
+            limits=httpx.Limits(max_keepalive_connections=4))
+    except ImportError:  # h2 missing
+        _client = None
+
+# path -> (etag, last_modified, body); lets repeat queries revalidate with a
+# conditional GET and skip the body transfer on 304 Not Modified.
+CACHE_PATH = os.path.join(tempfile.gettempdir(), 'skp_wh_debug_search')
+
+
+def _check_size(size):
+    if size > MAX_BODY:
+        raise IOError(f'response too large ({size} > {MAX_BODY} bytes)')
+
+
+def read_body(resp):
+    # Fill one preallocated buffer in place when the size is known instead
+    # of letting read() grow and copy a fresh bytes object.
+    size = int(resp.getheader('Content-Length') or 0)
+    try:
+        if size <= 0:
+            body = resp.read(MAX_BODY + 1)
+            _check_size(len(body))
+            return body
+        _check_size(size)
+    except IOError:
+        # The rest of the body is still unread on the keep-alive socket,
+        # drop it so the next request starts on a fresh connection
+        resp.close()
+        _conn.close()
+        raise
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = resp.readinto(view[got:])
+        if not n:
+            break
+        got += n
+    return buf if got == size else buf[:got]
+
+
+def gunzip(body):
+    # Same as gzip.decompress but stops once the output passes MAX_BODY
+    d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    out = d.decompress(body, MAX_BODY + 1)
+    _check_size(len(out))
+    return out
+
+
+def _send(path, extra_headers):
+    # -> (status, header getter, decoded body)
+    if _client is not None:
+        with _client.stream('GET', 'https://' + HOST + path,
+                            headers=extra_headers) as resp:
+            _check_size(int(resp.headers.get('Content-Length') or 0))
+            chunks, size = [], 0
+            for chunk in resp.iter_bytes():
+                size += len(chunk)
+                _check_size(size)
+                chunks.append(chunk)
+            return resp.status_code, resp.headers.get, b''.join(chunks)
+    req_headers = {**HEADERS, **extra_headers}
+    for attempt in (1, 2):
         try:
-            body = e.read().decode('utf-8', errors='replace')
-            print('Error body:\n', body[:1000])
-        except Exception:
-            pass
+            _conn.request('GET', path, headers=req_headers)
+            resp = _conn.getresponse()
+            body = read_body(resp)
+            if resp.getheader('Content-Encoding') == 'gzip':
+                body = gunzip(body)
+            return resp.status, resp.getheader, body
+        except (http.client.RemoteDisconnected, BrokenPipeError,
+                ConnectionResetError):
+            # Server dropped the idle socket; reconnect once
+            _conn.close()
+            if attempt == 2:
+                raise
+
+
+def fetch(path):
+    extra_headers = {}
+    with shelve.open(CACHE_PATH) as cache:
+        cached = cache.get(path)
+    if cached:
+        etag, last_modified, _body = cached
+        if etag:
+            extra_headers['If-None-Match'] = etag
+        if last_modified:
+            extra_headers['If-Modified-Since'] = last_modified
+    status, header, body = _send(path, extra_headers)
+    if status == 304 and cached:
+        return status, cached[2]
+    if status == 200:
+        etag = header('ETag')
+        last_modified = header('Last-Modified')
+        if etag or last_modified:
+            with shelve.open(CACHE_PATH) as cache:
+                cache[path] = (etag, last_modified, body)
+    return status, body
+
+
+async def fetch_page(session, query, offset):
+    url = 'https://' + HOST + build_path(query, offset)
+    async with session.get(url) as resp:
+        _check_size(resp.content_length or 0)
+        body = bytearray()
+        async for chunk in resp.content.iter_chunked(1 << 16):
+            body += chunk
+            _check_size(len(body))
+    keys = None
+    if resp.status == 200:
+        # Parse off the event loop so a large body does not stall the
+        # downloads still in flight
+        loop = asyncio.get_running_loop()
+        keys = await loop.run_in_executor(None, top_keys, body)
+    return offset, resp.status, len(body), keys
+
+
+async def fetch_pages(query, pages):
+    # All pages share one pooled keep-alive session so their round trips
+    # overlap instead of running back to back.
+    connector = aiohttp.TCPConnector(limit=8, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector,
+                                     headers=HEADERS) as session:
+        results = await asyncio.gather(
+            *(fetch_page(session, query, o)
+              for o in range(0, pages * PAGE_SIZE, PAGE_SIZE)))
+    for offset, status, length, keys in results:
+        print(f'Offset {offset}: status {status}, length {length}, '
+              f'top keys {keys}')
+
+
+def run(query: str = 'chair', offset: int = 0) -> dict:
+    """Run one search and print status, length and top-level keys"""
+    path = build_path(query, offset)
+    print('Testing URL:', f"https://{HOST}{path}")
+    result = {'status': None, 'length': 0, 'top_keys': None}
+    try:
+        status, body = fetch(path)
+        result.update(status=status, length=len(body))
+        print('Status:', status, '(cached)' if status == 304 else '')
+        print('Length:', len(body))
+        if status >= 400:
+            print('Error body:\n',
+                  body[:1000].decode('utf-8', errors='replace'))
+        else:
+            try:
+                result['top_keys'] = top_keys(body)
+                print('Top keys:', result['top_keys'])
+            except ValueError as e:  # JSONDecodeError from any parser
+                print('JSON parse failed:', e)
+    except Exception as e:
+        print('Request failed:', type(e).__name__, e)
+    return result
+
+
+if __name__ == '__main__':
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else PAGES
+    if pages > 1 and aiohttp is None:
+        print('aiohttp not installed, fetching a single page')
+    if pages > 1 and aiohttp is not None:
+        asyncio.run(fetch_pages('chair', pages))
+    else:
+        run()
@@ -37,7 +37,12 @@ ext_modules = [
               extra_compile_args=extra_compile_args,
               extra_link_args=extra_link_args,
               #   embedsignature=True,
-              )]
+              ),
+    Extension("warehouse_query",  # optional speedups for the search helpers
+              ["warehouse_query.pyx"],
+              optional=True,  # a failed build must not stop the addon binding
+              ),
+]
 
 for e in ext_modules:
     e.cython_directives = {'language_level': "3"}  # all are Python-3
@@ -384,6 +384,17 @@ cdef class Instance:
             c.comp_def.ptr = component.ptr
             return c
 
+    def __hash__(self):
+        return hash(<size_t> self.instance.ptr)
+
+    def __richcmp__(Instance self, other, int op):
+        # Wrappers are created on every access, compare the SketchUp handle
+        if op != 2 and op != 3:
+            return NotImplemented
+        same = isinstance(other, Instance) and \
+            <size_t> self.instance.ptr == <size_t> (<Instance> other).instance.ptr
+        return same if op == 2 else not same
+
     property transform:
         def __get__(self):
             cdef SUTransformation t
@@ -513,6 +524,17 @@ cdef class Group:
             check_result(SUGroupGetName(self.group, &n))
             return StringRef2Py(n)
 
+    def __hash__(self):
+        return hash(<size_t> self.group.ptr)
+
+    def __richcmp__(Group self, other, int op):
+        # Wrappers are created on every access, compare the SketchUp handle
+        if op != 2 and op != 3:
+            return NotImplemented
+        same = isinstance(other, Group) and \
+            <size_t> self.group.ptr == <size_t> (<Group> other).group.ptr
+        return same if op == 2 else not same
+
     property transform:
         def __get__(self):
             cdef SUTransformation t
@@ -949,10 +971,14 @@ cdef class Model:
 
     @staticmethod
     def from_file(filename):
-        res = Model(__skip_init=True)
+        cdef Model res = Model(__skip_init=True)
         py_byte_string = filename.encode('UTF-8')
         cdef const char* f = py_byte_string
-        check_result(SUModelCreateFromFile(&(res.model), f))
+        cdef SU_RESULT r
+        # Reading a large file takes a while, let other threads run meanwhile
+        with nogil:
+            r = SUModelCreateFromFile(&(res.model), f)
+        check_result(r)
         return res
 
     def save(self, filename):
@@ -3,6 +3,8 @@
 from collections import OrderedDict, defaultdict
 from enum import Enum
 
+import numpy as np
+
 default_material_name = "Material"
 magic_num = 555555
 
@@ -47,6 +49,98 @@ class keep_offset(defaultdict):
         return number
 
 
+def unique_rows(rows):
+    """
+    Deduplicate the rows of a 2D array in one pass, numbering them in the
+    order they are first seen, the same way keep_offset does.
+    Returns (unique rows, index into them for every input row)
+    """
+
+    # -0.0 + 0.0 gives 0.0, so signed zeros hash as the same bytes
+    rows = np.ascontiguousarray(rows + 0.0)
+    keys = rows.view(np.dtype((np.void, rows.dtype.itemsize *
+                               rows.shape[1]))).reshape(-1)
+    _, first, inverse = np.unique(keys, return_index=True,
+                                  return_inverse=True)
+    order = np.argsort(first)
+    offset = np.empty_like(order)
+    offset[order] = np.arange(len(order))
+
+    return rows[first[order]], offset[inverse.reshape(-1)]
+
+
+def decompose_basis(transforms):
+    """
+    Split the 3x3 basis of a (N, 4, 4) stack of transforms into scale and
+    rotation like Matrix.decompose(), without building a Matrix per item.
+    Returns ((N, 3) scales, (N, 3, 3) rotation matrices)
+    """
+
+    basis = transforms[:, :3, :3]
+    scales = np.linalg.norm(basis, axis=1)
+    # decompose() negates all of the scale for mirrored transforms
+    scales *= np.where(np.linalg.det(basis) < 0, -1.0, 1.0)[:, None]
+
+    return scales, basis / scales[:, None, :]
+
+
+def bucket_rows(values, decimals=5):
+    """
+    Group the rows of a 2D float array that are equal once quantized to
+    integers at the given number of decimals, so float noise does not split
+    them. Buckets come in the order their first row is seen.
+    Returns a list of index arrays, one per bucket
+    """
+
+    keys = np.rint(values * 10 ** decimals).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True,
+                                  return_inverse=True)
+    inverse = inverse.reshape(-1)
+    order = np.argsort(inverse, kind='stable')
+    buckets = np.split(order, np.cumsum(np.bincount(inverse))[:-1])
+
+    return [buckets[b] for b in np.argsort(first)]
+
+
+def merge_mesh_arrays(parts):
+    """
+    Concatenate mesh arrays (as built for write_mesh_data) into one set,
+    moving each part's vertices by its (4, 4) transform and renumbering
+    its materials into a shared keep_offset. Parts under a mirroring
+    transform get their triangle winding flipped so normals stay outward.
+    Returns the merged arrays in the same layout
+    """
+
+    mats = keep_offset()
+    verts = []
+    loops_vert_idx = []
+    uv_list = []
+    mat_index = []
+    offset = 0
+    for arrays, transform in parts:
+        verts.append(arrays['verts'] @ transform[:3, :3].T + transform[:3, 3])
+        loops = arrays['loops_vert_idx'] + offset
+        uvs = arrays['uv_list']
+        if np.linalg.det(transform[:3, :3]) < 0:
+            # Swapping the last two corners reverses each triangle
+            loops = loops.reshape(-1, 3)[:, (0, 2, 1)].reshape(-1)
+            uvs = uvs.reshape(-1, 3, 2)[:, (0, 2, 1)].reshape(uvs.shape)
+        loops_vert_idx.append(loops)
+        uv_list.append(uvs)
+        offset += len(arrays['verts'])
+        remap = np.array([mats[k] for k in arrays['mats']], dtype=np.int32)
+        mat_index.append(remap[arrays['mat_index']])
+
+    return {
+        'verts': np.concatenate(verts).astype(np.float32),
+        'loops_vert_idx': np.concatenate(loops_vert_idx).astype(np.int32),
+        'uv_list': np.concatenate(uv_list),
+        'mat_index': np.concatenate(mat_index),
+        'smooth': np.concatenate([a['smooth'] for a, _t in parts]),
+        'mats': mats,
+    }
+
+
 def group_name(name, material):
 
     if material != default_material_name:
@@ -81,29 +175,3 @@ class EntityType(Enum):
     group = 1
     component = 2
     outer = 3
-
-
-class SKP_util:
-
-    layers_skip = []
-
-    def component_deps(self, entities, comp=True):
-
-        own_depth = 1 if comp else 0
-        group_depth = 0
-        for group in entities.groups:
-            if self.layers_skip and group.layer in self.layers_skip:
-                continue
-            group_depth = max(group_depth, self.component_deps(
-                group.entities, comp=False))
-
-        instance_depth = 0
-        for instance in entities.instances:
-            if self.layers_skip and instance.layer in self.layers_skip:
-                continue
-            instance_depth = max(instance_depth,
-                                 1 + self.component_deps(
-                                     instance.definition.entities)
-                                 )
-
-        return max(own_depth, group_depth, instance_depth)
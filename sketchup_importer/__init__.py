@@ -18,24 +18,57 @@ You should have received a copy of the GNU General Public License
 along with this program; if not, see http://www.gnu.org/licenses
 '''
 
+import io
 import math
 import os
+import queue
 import shutil
+import sys
 import tempfile
+import threading
 import time
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
 # Added for 3D Warehouse import
 import re
 import json
 import urllib.request
 import urllib.error
-import wget  # ensure wget is imported unconditionally (still available for fallback if needed)
+from urllib.parse import quote
+
+try:
+    import requests  # bundled with Blender, streams large downloads
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+try:
+    from orjson import loads as _json_loads  # parses bytes directly
+except ImportError:
+    _json_loads = json.loads  # also accepts UTF-8 bytes
+
+try:
+    import asyncio
+    import aiohttp  # not bundled with Blender, thumbnails use threads then
+except ImportError:
+    aiohttp = None
+
+try:
+    from PIL import Image  # not bundled with Blender, thumbnails load as is
+except ImportError:
+    Image = None
+
+import numpy as np
 
 import bpy
 from bpy.props import (BoolProperty, EnumProperty, FloatProperty, IntProperty,
                        StringProperty)
 from bpy.types import AddonPreferences, Operator
-from bpy_extras.io_utils import (ExportHelper, ImportHelper, unpack_face_list,
-                                 unpack_list)
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 from mathutils import Matrix, Euler, Quaternion, Vector
 
 from . import sketchup
@@ -66,6 +99,19 @@ MIN_LOGS = False
 if not LOGS:
     MIN_LOGS = True
 
+# SketchUp colors are 8 bit sRGB, convert them to linear with a lookup
+_SRGB_LUT = tuple(math.pow((i / 255.0), 2.2) for i in range(256))
+
+# Corners (as columns) of the small quad each face duplicated instance sits on
+_DUPLI_FACE_CORNERS = np.array(((-0.05, 0.05, 0.05, -0.05),
+                                (-0.05, -0.05, 0.05, 0.05),
+                                (0.0, 0.0, 0.0, 0.0),
+                                (1.0, 1.0, 1.0, 1.0)), dtype=np.float32)
+
+# Blender < 2.8 puts group members on layer 19; newer versions have no layers
+_LEGACY_LAYERS = (18 * (False,) + (True, False)
+                  if hasattr(bpy.types.Object, 'layers') else None)
+
 
 class SketchupAddonPreferences(AddonPreferences):
     bl_idname = __name__
@@ -81,6 +127,13 @@ class SketchupAddonPreferences(AddonPreferences):
         default=1000
     )
 
+    strict_validate: BoolProperty(
+        name="Validate Imported Meshes",
+        description="Run a full mesh validation on every imported mesh. "
+                    "Slower, only needed for broken SketchUp files",
+        default=False
+    )
+
     warehouse_cookie: StringProperty(
         name="3D Warehouse Cookie",
         description="Paste your 3dwarehouse.sketchup.com Cookie header here for restricted downloads.",
@@ -97,6 +150,9 @@ class SketchupAddonPreferences(AddonPreferences):
         row = layout.row()
         row.use_property_split = True
         row.prop(self, 'draw_bounds')
+        row = layout.row()
+        row.use_property_split = True
+        row.prop(self, 'strict_validate')
         layout.separator()
         layout.label(text="- 3D Warehouse Download -")
         row = layout.row()
@@ -170,6 +226,10 @@ class SceneImporter():
         self.component_skip = proxy_dict()
         self.component_depth = proxy_dict()
         self.group_written = {}
+        self._walk_cache = {}
+        self._matrix_cache = {}
+        self._merged_meshes = {}
+        self._keys = {}
         ren_res_x = context.scene.render.resolution_x
         ren_res_y = context.scene.render.resolution_y
         self.aspect_ratio = ren_res_x / ren_res_y
@@ -180,12 +240,23 @@ class SceneImporter():
         # Log filename being imported
         if LOGS:
             skp_log(f"Importing: {self.filepath}")
+
+        # Open the SketchUp file and access the model using SketchUp API.
+        # The SDK reads the file itself (SUModelCreateFromFile), no Python
+        # side buffer is involved that a memory map could save a copy of.
+        # This runs on a worker thread while the Blender side is set up.
+        pool = ThreadPoolExecutor(max_workers=1)
+        model_future = pool.submit(sketchup.Model.from_file, self.filepath)
+        pool.shutdown(wait=False)
+
         addon_name = __name__.split('.')[0]
         self.prefs = context.preferences.addons[addon_name].preferences
 
-        # Open the SketchUp file and access the model using SketchUp API
+        # Create collection for cameras
+        create_nested_collection("SKP Scenes (as Cameras)")
+
         try:
-            self.skp_model = sketchup.Model.from_file(self.filepath)
+            self.skp_model = model_future.result()
         except Exception as e:
             if LOGS:
                 skp_log(f"Error reading input file: {self.filepath}")
@@ -199,9 +270,6 @@ class SceneImporter():
                     "Cameras ===")
         _time_camera = time.time()
 
-        # Create collection for cameras
-        create_nested_collection("SKP Scenes (as Cameras)")
-
         # Import a specific named SketchUp scene as a Blender camera and hide
         # the layers associated with that specific scene
         if options['import_scene']:
@@ -245,7 +313,6 @@ class SceneImporter():
                 if area.type == 'VIEW_3D':
                     area.spaces[0].region_3d.view_perspective = 'CAMERA'
                     break
-        SKP_util.layers_skip = self.layers_skip
         if not MIN_LOGS:
             skp_log("Cameras imported in "
                     f"{(time.time() - _time_camera):.4f} sec.")
@@ -277,21 +344,15 @@ class SceneImporter():
             print(f"SU | Contains {len(u_comps)} components: \n     ", end="")
             print(*u_comps, sep=', ')
 
-        # Analyse component depths
-        D = SKP_util()
-        for c in self.skp_model.component_definitions:
-            self.component_depth[c.name] = D.component_deps(c.entities)
-            if DEBUG:
-                print(f"     -- ({c.name}) --\n        "
-                      f"Depth: {self.component_depth[c.name]}\n", end="")
-                print("        Instances (Used): "
-                      f"{c.numInstances} ({c.numUsedInstances})")
+        # Walk the model once for component instances and depths
+        instance_counts = defaultdict(int)
+        self._walk(self.skp_model.entities, instance_counts=instance_counts)
         if not MIN_LOGS:
             skp_log(f"Component depths analyzed in "
                     f"{(time.time() - _time_analyze_depth):.4f} sec.")
 
         # Import the components as duplicated groups then hide components
-        self.write_duplicateable_groups()
+        self.write_duplicateable_groups(instance_counts)
         bpy.data.collections['SKP Components'].hide_viewport = True
         for vl in context.scene.view_layers:
             for l in vl.active_layer_collection.children:
@@ -313,12 +374,16 @@ class SceneImporter():
         self.write_entities(self.skp_model.entities,
                             "_(Loose Entity)",
                             Matrix.Identity(4))
-        for k, _v in self.component_stats.items():
+        for k, v in self.component_stats.items():
             name, mat = k
+            # The world transforms are staged as a list of Matrix objects
+            # while walking, then copied once into one contiguous (N, 4, 4)
+            # float32 stack per component for the vectorized dupli writers
+            transforms = np.asarray(v, dtype=np.float32).reshape(-1, 4, 4)
             if options['dedub_type'] == 'VERTEX':
-                self.instance_group_dupli_vert(name, mat, self.component_stats)
+                self.instance_group_dupli_vert(name, mat, transforms)
             else:
-                self.instance_group_dupli_face(name, mat, self.component_stats)
+                self.instance_group_dupli_face(name, mat, transforms)
         if not MIN_LOGS:
             skp_log("Entities imported in "
                     f"{(time.time() - _time_mesh_data):.4f} sec.")
@@ -332,91 +397,152 @@ class SceneImporter():
     #
     # Write components as groups that can be duplicated later.
     #
-    def write_duplicateable_groups(self):
-        component_stats = self.analyze_entities(
-            self.skp_model.entities,
-            "Sketchup",
-            Matrix.Identity(4),
-            component_stats=defaultdict(list))
+    def write_duplicateable_groups(self,
+                                   instance_counts):
         instance_when_over = self.max_instance
-        max_depth = max(self.component_depth.values(), default=0)
 
         # Filter out components from list if the total number of instances
         # is lower than the minimum threshold for creating duplicated mesh
-        # objects.
-        component_stats = {
-            k: v
-            for k, v in component_stats.items() if len(v) >= instance_when_over
-        }
-        for i in range(max_depth + 1):
-            for k, v in component_stats.items():
-                name, mat = k
-                depth = self.component_depth[name]
-                comp_def = self.skp_components[name]
-                if comp_def and depth == 1:
-                    #self.component_skip[(name, mat)] = comp_def.entities
-                    pass
-                elif comp_def and depth == i:
-                    gname = group_name(name, mat)
-                    if self.reuse_group and gname in bpy.data.collections:
-                        skp_log("Group {} already defined".format(gname))
-                        self.component_skip[(name, mat)] = comp_def.entities
-                        self.group_written[(name,
-                                            mat)] = bpy.data.collections[gname]
-                    else:
-                        group = bpy.data.collections.new(name=gname)
-                        skp_log("Component {} written as group".format(gname))
-                        self.component_def_as_group(comp_def.entities,
-                                                    name,
-                                                    Matrix(),
-                                                    default_material=mat,
-                                                    etype=EntityType.outer,
-                                                    group=group)
-                        self.component_skip[(name, mat)] = comp_def.entities
-                        self.group_written[(name, mat)] = group
-
-    def analyze_entities(self,
-                         entities,
-                         name,
-                         transform,
-                         default_material="Material",
-                         etype=EntityType.none,
-                         component_stats=None,
-                         component_skip=None):
-        if component_skip is None:
-            component_skip = []
-        if etype == EntityType.component:
-            component_stats[(name, default_material)].append(transform)
-        for group in entities.groups:
-            if self.layers_skip and group.layer in self.layers_skip:
-                continue
+        # objects. Deeper components are written last so the groups nested
+        # inside them already exist.
+        queued = sorted(
+            (k for k, n in instance_counts.items()
+             if n >= instance_when_over),
+            key=lambda k: self.component_depth[k[0]])
+
+        # Mesh arrays are built one component at a time on the main thread:
+        # the binding's Face/tessellation calls all hold the GIL, so worker
+        # threads would only add up every component's arrays in memory.
+        for name, mat in queued:
+            key = self._key(name, mat)
+            depth = self.component_depth[name]
+            comp_def = self.skp_components[name]
+            if comp_def and depth == 1:
+                #self.component_skip[(name, mat)] = comp_def.entities
+                pass
+            elif comp_def:
+                gname = group_name(name, mat)
+                if self.reuse_group and gname in bpy.data.collections:
+                    skp_log("Group {} already defined".format(gname))
+                    self.component_skip[key] = comp_def.entities
+                    self.group_written[key] = bpy.data.collections[gname]
+                else:
+                    group = bpy.data.collections.new(name=gname)
+                    skp_log("Component {} written as group".format(gname))
+                    self.component_def_as_group(comp_def.entities,
+                                                name,
+                                                Matrix(),
+                                                default_material=mat,
+                                                etype=EntityType.outer,
+                                                group=group)
+                    self.component_skip[key] = comp_def.entities
+                    self.group_written[key] = group
+
+    #
+    # Walk the model once, counting the instances of every component and
+    # material into instance_counts and storing the nesting depth of every
+    # definition passed in self.component_depth. Returns the depth of the
+    # walked entities. Only the counts are needed to decide which components
+    # become groups, the instance transforms are collected by write_entities.
+    #
+    def _walk(self,
+              entities,
+              default_material="Material",
+              etype=EntityType.none,
+              instance_counts=None):
+        own_depth = 1 if etype == EntityType.component else 0
+        group_depth = 0
+        for group in self._visible(entities.groups):
             if DEBUG:
                 print(f"     |G {group.name}")
-                print(f"     {Matrix(group.transform)}")
-            self.analyze_entities(group.entities,
-                                  "G-" + group.name,
-                                  transform @ Matrix(group.transform),
-                                  default_material=inherent_default_mat(
-                                      group.material, default_material),
-                                  etype=EntityType.group,
-                                  component_stats=component_stats)
-        for instance in entities.instances:
-            if self.layers_skip and instance.layer in self.layers_skip:
-                continue
+                print(f"     {self._matrix(group)}")
+            group_depth = max(group_depth, self._walk(
+                group.entities,
+                default_material=inherent_default_mat(group.material,
+                                                      default_material),
+                etype=EntityType.group,
+                instance_counts=instance_counts))
+        instance_depth = 0
+        for instance in self._visible(entities.instances):
             mat = inherent_default_mat(instance.material, default_material)
             cdef = self.skp_components[instance.definition.name]
-            if (cdef.name, mat) in component_skip:
-                continue
             if DEBUG:
                 print(f"     |C {cdef.name}")
-                print(f"     {Matrix(instance.transform)}")
-            self.analyze_entities(cdef.entities,
-                                  cdef.name,
-                                  transform @ Matrix(instance.transform),
-                                  default_material=mat,
-                                  etype=EntityType.component,
-                                  component_stats=component_stats)
-        return component_stats
+                print(f"     {self._matrix(instance)}")
+            for k, n in self._walk_definition(cdef, mat).items():
+                instance_counts[k] += n
+            instance_depth = max(instance_depth,
+                                 1 + self.component_depth[cdef.name])
+        return max(own_depth, group_depth, instance_depth)
+
+    #
+    # One shared (name, material) tuple per component and material, with
+    # interned strings. The tuples are used as keys in several dicts, sharing
+    # them lets lookups compare by identity instead of by value.
+    #
+    def _key(self,
+             name,
+             default_material):
+        key = (name, default_material)
+        try:
+            return self._keys[key]
+        except KeyError as _e:
+            key = (sys.intern(name), sys.intern(default_material))
+            self._keys[key] = key
+            return key
+
+    #
+    # Groups or component instances that are not on a layer hidden by the
+    # imported scene. Without hidden layers the items are passed through
+    # as they are, so the loops over them need no per item check.
+    #
+    def _visible(self,
+                 items):
+        if not self.layers_skip:
+            return items
+        return (e for e in items if e.layer not in self.layers_skip)
+
+    #
+    # Local transform of a group or component instance as a Matrix. Groups
+    # and instances hash by their SketchUp handle, so the ones reached again
+    # through a shared definition, or from write_entities after the walk,
+    # are only converted once.
+    #
+    def _matrix(self,
+                entity):
+        try:
+            return self._matrix_cache[entity]
+        except KeyError as _e:
+            transform = Matrix(entity.transform)
+            self._matrix_cache[entity] = transform
+            return transform
+
+    #
+    # Instance counts of a definition and everything nested in it. These are
+    # the same for every instance of the definition, so they are only
+    # gathered once and added up by the caller.
+    #
+    def _walk_definition(self,
+                         cdef,
+                         default_material):
+        key = self._key(cdef.name, default_material)
+        try:
+            return self._walk_cache[key]
+        except KeyError as _e:
+            local_counts = defaultdict(int)
+            local_counts[key] = 1
+            self.component_depth[cdef.name] = self._walk(
+                cdef.entities,
+                default_material=default_material,
+                etype=EntityType.component,
+                instance_counts=local_counts)
+            if DEBUG:
+                print(f"     -- ({cdef.name}) --\n        "
+                      f"Depth: {self.component_depth[cdef.name]}\n", end="")
+                print("        Instances (Used): "
+                      f"{cdef.numInstances} ({cdef.numUsedInstances})")
+            self._walk_cache[key] = local_counts
+            return local_counts
 
     #
     # Import materials from SketchUp into Blender.
@@ -435,6 +561,10 @@ class SceneImporter():
             #if self.render_engine == 'CYCLES':
             bmat.use_nodes = True
             self.materials['Material'] = bmat
+        # Textures are written here one by one to be loaded and packed
+        skp_fname = os.path.splitext(os.path.basename(self.filepath))[0]
+        temp_dir = os.path.join(tempfile.gettempdir(), skp_fname)
+        os.makedirs(temp_dir, exist_ok=True)
         for mat in materials:
             name = mat.name
             if mat.texture:
@@ -445,33 +575,30 @@ class SceneImporter():
                 bmat = bpy.data.materials.new(name)
                 r, g, b, a = mat.color
                 tex = mat.texture
-                bmat.diffuse_color = (math.pow((r / 255.0), 2.2),
-                                      math.pow((g / 255.0), 2.2),
-                                      math.pow((b / 255.0), 2.2),
-                                      round((a / 255.0), 2))  # sRGB to Linear
+                alpha = round((a / 255.0), 2)
+                bmat.diffuse_color = (_SRGB_LUT[r],
+                                      _SRGB_LUT[g],
+                                      _SRGB_LUT[b],
+                                      alpha)  # sRGB to Linear
 
-                if round((a / 255.0), 2) < 1:
+                if alpha < 1:
                     bmat.blend_method = 'BLEND'
                 bmat.use_nodes = True
                 default_shader = bmat.node_tree.nodes['Principled BSDF']
                 default_shader_base_color = default_shader.inputs['Base Color']
                 default_shader_base_color.default_value = bmat.diffuse_color
                 default_shader_alpha = default_shader.inputs['Alpha']
-                default_shader_alpha.default_value = round((a / 255.0), 2)
+                default_shader_alpha.default_value = alpha
                 if tex:
-                    tex_name = tex.name.split("\\")[-1]
-                    temp_dir = tempfile.gettempdir()
-                    skp_fname = self.filepath.split("\\")[-1].split(".")[0]
-                    temp_dir += '\\' + skp_fname
-                    if not os.path.isdir(temp_dir):
-                        os.mkdir(temp_dir)
+                    # SketchUp keeps the texture's original (often Windows)
+                    # path as its name
+                    tex_name = os.path.basename(tex.name.replace("\\", "/"))
                     temp_file_path = os.path.join(temp_dir, tex_name)
                     #skp_log(f"Texture saved temporarily at {temp_file_path}")
                     tex.write(temp_file_path)
                     img = bpy.data.images.load(temp_file_path)
                     img.pack()
-                    #os.remove(temp_file_path)
-                    shutil.rmtree(temp_dir)
+                    os.remove(temp_file_path)  # pixels now live in the .blend
                     #if self.render_engine == 'CYCLES':
                     #    bmat.use_nodes = True
                     tex_node = bmat.node_tree.nodes.new('ShaderNodeTexImage')
@@ -486,47 +613,68 @@ class SceneImporter():
                 self.materials[name] = bpy.data.materials[name]
             if not MIN_LOGS:
                 print(f"     {name}")
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
     def write_mesh_data(self,
                         entities=None,
                         name="",
                         default_material='Material'):
 
-        mesh_key = (name, default_material)
+        mesh_key = self._key(name, default_material)
         if mesh_key in self.component_meshes:
             return self.component_meshes[mesh_key]
+        if entities.NumFaces() == 0:
+            # Groups only used to organise nested entities have no mesh
+            self.component_meshes[mesh_key] = None, False
+            return None, False
+        arrays = self._build_mesh_arrays(entities, default_material)
+        if arrays is None:
+            return None, False
+        me, alpha = self._commit_mesh_arrays(name, arrays)
+        self.component_meshes[mesh_key] = me, alpha
+
+        return me, alpha
+
+    #
+    # Gather the mesh data of entities into numpy arrays. This only reads
+    # from the SketchUp model and does not touch Blender data; the arrays of
+    # several parts can be merged before _commit_mesh_arrays.
+    #
+    def _build_mesh_arrays(self,
+                           entities,
+                           default_material='Material'):
         verts = []
-        loops_vert_idx = []
-        mat_index = []
-        smooth = []
+        tris = []
+        uvs = []
+        face_offset = []
+        face_tris = []
+        face_mat = []
+        face_smooth = []
         mats = keep_offset()
-        seen = keep_offset()
-        uv_list = []
-        alpha = False
-        uvs_used = False
 
+        # Faces without their own material take the texture scale of the
+        # inherited one, the same for the whole mesh
+        default_scale = None
+        if default_material != 'Material':
+            default_scale = self.materials_scales.get(default_material)
+
+        # Only copy the tessellation out of SketchUp here, deduplication and
+        # loop building is done in bulk with numpy below.
         for f in entities.faces:
 
             if f.material:
                 mat_number = mats[f.material.name]
             else:
                 mat_number = mats[default_material]
-                if default_material != 'Material':
-                    try:
-                        f.st_scale = self.materials_scales[default_material]
-                    except KeyError as _e:
-                        pass
+                if default_scale is not None:
+                    f.st_scale = default_scale
 
-            vs, tri, uvs = f.tessfaces
-            num_loops = 0
-
-            mapping = {}
-            for i, (v, uv) in enumerate(zip(vs, uvs)):
-                l = len(seen)
-                mapping[i] = seen[v]
-                if len(seen) > l:
-                    verts.append(v)
-                uvs.append(uv)
+            vs, tri, uv = f.tessfaces
+            face_offset.append(len(verts))
+            face_tris.append(len(tri))
+            verts.extend(vs)
+            uvs.extend(uv)
+            tris.extend(tri)
 
             smooth_edge = False
 
@@ -535,39 +683,61 @@ class SceneImporter():
                     smooth_edge = True
                     break
 
-            for face in tri:
-                f0, f1, f2 = face[0], face[1], face[2]
-                num_loops += 1
-
-                if mapping[f2] == 0:
-                    loops_vert_idx.extend([mapping[f2],
-                                           mapping[f0],
-                                           mapping[f1]])
-
-                    uv_list.append((uvs[f2][0], uvs[f2][1],
-                                    uvs[f0][0], uvs[f0][1],
-                                    uvs[f1][0], uvs[f1][1]))
-
-                else:
-                    loops_vert_idx.extend([mapping[f0],
-                                           mapping[f1],
-                                           mapping[f2]])
+            face_smooth.append(smooth_edge)
+            face_mat.append(mat_number)
 
-                    uv_list.append((uvs[f0][0], uvs[f0][1],
-                                    uvs[f1][0], uvs[f1][1],
-                                    uvs[f2][0], uvs[f2][1]))
+        if len(verts) == 0:
+            return None
 
-                smooth.append(smooth_edge)
-                mat_index.append(mat_number)
+        # Face local triangle indices to indices into the gathered vertices
+        tris = np.array(tris, dtype=np.intp).reshape(-1, 3)
+        tris += np.repeat(face_offset, face_tris)[:, None]
+
+        verts, mapping = unique_rows(np.array(verts))
+        mapping = mapping.astype(np.int32)
+
+        # Triangles ending on vertex 0 are rotated to start with it
+        order = np.where((mapping[tris[:, 2]] == 0)[:, None],
+                         (2, 0, 1), (0, 1, 2))
+        tris = np.take_along_axis(tris, order, axis=1)
+
+        # Arrays are kept in the types of the RNA properties they are set
+        # on, so foreach_set can copy the buffers directly
+        loops_vert_idx = mapping[tris].reshape(-1)
+        uv_list = np.array(uvs, dtype=np.float32).reshape(-1, 2)[tris]
+        mat_index = np.repeat(np.array(face_mat, dtype=np.int32), face_tris)
+        smooth = np.repeat(np.array(face_smooth, dtype=np.bool_), face_tris)
+
+        return {
+            'verts': verts.astype(np.float32),
+            'loops_vert_idx': loops_vert_idx,
+            'uv_list': uv_list,
+            'mat_index': mat_index,
+            'smooth': smooth,
+            'mats': mats,
+        }
 
-        if len(verts) == 0:
-            return None, False
+    #
+    # Create a Blender mesh from the arrays of _build_mesh_arrays. Must run
+    # on the main thread.
+    #
+    def _commit_mesh_arrays(self,
+                            name,
+                            arrays):
+        verts = arrays['verts']
+        loops_vert_idx = arrays['loops_vert_idx']
+        uv_list = arrays['uv_list']
+        mat_index = arrays['mat_index']
+        smooth = arrays['smooth']
+        mats = arrays['mats']
+        alpha = False
+        uvs_used = False
 
         me = bpy.data.meshes.new(name)
 
         if len(mats) >= 1:
-            mats_sorted = OrderedDict(sorted(mats.items(), key=lambda x: x[1]))
-            for k in mats_sorted.keys():
+            # keep_offset numbers materials in insertion order already
+            for k in mats:
                 try:
                     bmat = self.materials[k]
                 except KeyError as _e:
@@ -589,19 +759,13 @@ class SceneImporter():
         else:
             skp_log(f"WARNING: Object {name} has no material!")
 
-        tri_faces = list(zip(*[iter(loops_vert_idx)] * 3))
-        tri_face_count = len(tri_faces)
+        tri_face_count = len(mat_index)
 
-        loop_start = []
-        i = 0
-        for f in tri_faces:
-            loop_start.append(i)
-            i += len(f)
-
-        loop_total = list(map(lambda f: len(f), tri_faces))
+        loop_start = np.arange(0, 3 * tri_face_count, 3, dtype=np.int32)
+        loop_total = np.full(tri_face_count, 3, dtype=np.int32)
 
         me.vertices.add(len(verts))
-        me.vertices.foreach_set('co', unpack_list(verts))
+        me.vertices.foreach_set('co', verts.reshape(-1))
 
         me.loops.add(len(loops_vert_idx))
         me.loops.foreach_set('vertex_index', loops_vert_idx)
@@ -613,26 +777,21 @@ class SceneImporter():
         me.polygons.foreach_set('use_smooth', smooth)
 
         if uvs_used:
-            k, l = 0, 0
             me.uv_layers.new()
-            for i in range(len(tri_faces)):
-                for j in range(3):
-                    uv_cordinates = (uv_list[i][l], uv_list[i][l + 1])
-                    me.uv_layers[0].data[k].uv = Vector(uv_cordinates)
-                    k += 1
-                    if j != 2:
-                        l += 2
-                    else:
-                        l = 0
+            me.uv_layers[0].data.foreach_set('uv', uv_list.reshape(-1))
 
-        me.update(calc_edges=True)
-        me.validate()
-        self.component_meshes[mesh_key] = me, alpha
+        # Meshes come from SketchUp's own triangulation, so only check them
+        # when asked to. update() still fills in the missing edges.
+        if self.prefs.strict_validate:
+            me.update(calc_edges=True)
+            me.validate()
+        else:
+            me.update()
 
         return me, alpha
 
     #
-    # Recursively import all the mesh objects. Groups containing no mesh
+    # Import all the mesh objects, depth first. Groups containing no mesh
     # information are imported as empty objects and can contain nested
     # groups or components. This approach preserves the hierarchy from the
     # SketchUp outliner.
@@ -646,125 +805,123 @@ class SceneImporter():
                        parent_name=None,
                        parent_location=Vector((0, 0, 0))):
 
-        # Check if this is a component that has already been duplicated. We
-        # can skip writing this if it is already contained in a duplication
-        # group.
-        if etype == EntityType.component and (
-                name, default_material) in self.component_skip:
-            self.component_stats[(name,
-                                  default_material)].append(parent_transform)
-            return
+        # Nested groups and components are written depth first from an
+        # explicit stack, so deep SketchUp hierarchies do not run into the
+        # recursion limit. Group names are only made unique once an item is
+        # taken off the stack, which keeps the original naming order.
+        stack = [(entities, name, None, parent_transform, default_material,
+                  etype, parent_name, parent_location)]
+        while stack:
+            (entities, name, group, parent_transform, default_material,
+             etype, parent_name, parent_location) = stack.pop()
+            if group is not None:
+                temp_ob = bpy.data.objects.new(group.name, None)
+                name = "G-" + group_safe_name(temp_ob.name)
+            if DEBUG and parent_name is not None:
+                kind = "Grp" if etype == EntityType.group else "Cmp"
+                print(f"     {kind}: {name} in {parent_name}")
+
+            # Check if this is a component that has already been duplicated.
+            # We can skip writing this if it is already contained in a
+            # duplication group.
+            key = self._key(name, default_material)
+            if etype == EntityType.component and key in self.component_skip:
+                self.component_stats[key].append(parent_transform)
+                continue
 
-        # Get the mesh data for this object
-        me, alpha = self.write_mesh_data(entities=entities, name=name,
-                                         default_material=default_material)
-
-        # If there are no further nested groups or components, then we can
-        # create an object containing the mesh. Otherwise we create a new
-        # empty object and place an object containing the loose geometry as
-        # a mesh within this group.
-        nested_groups = 0
-        for group in entities.groups:
-            nested_groups += 1  # count groups (brute force approach)
-        nested_comps = 0
-        for comp in entities.instances:
-            nested_comps += 1  # count components (brute force approach)
-        nested_count = nested_groups + nested_comps
-        hide_empty = False
-        if nested_count == 0 or name == "_(Loose Entity)":
-            ob = bpy.data.objects.new(name, me)
-            ob.matrix_world = parent_transform
-            if 0.01 < alpha < 1.0:
-                ob.show_transparent = True
-            if me:
-                me.update(calc_edges=True)
-        else:
-            ob = bpy.data.objects.new(name, None)  # empty object to hold group
-            ob.matrix_world = parent_transform
-            #ob.hide_viewport = True  # disable empties in viewport
-            hide_empty = True
-            if me:
-                ob_mesh = bpy.data.objects.new("_" + name + " (Loose Mesh)",
-                                               me)
-                ob_mesh.matrix_world = parent_transform
-                if 0.01 < alpha < 1.0:
-                    ob_mesh.show_transparent = True
-                me.update(calc_edges=True)
-                ob_mesh.parent = ob
-                ob_mesh.location = Vector((0, 0, 0))
-                bpy.context.collection.objects.link(ob_mesh)
-
-        # Nested adjustments to the world matrix
-        loc = ob.location
-        nested_location = Vector((loc[0], loc[1], loc[2]))
-
-        # Nest the object by assigning it to the parent object
-        if parent_name is not None and parent_name != "_(Loose Entity)":
-            ob.parent = bpy.data.objects[parent_name]
-            ob.location -= parent_location
-        if nested_count > 0:
-            ob.rotation_mode = 'QUATERNION'  # change from default mode of xyz
-            ob.rotation_quaternion = Vector((1, 0, 0, 0))
-            ob.scale = Vector((1, 1, 1))
-        bpy.context.collection.objects.link(ob)
-        ob.hide_set(hide_empty)  # enable but do not show empties in viewport
+            # Get the mesh data for this object
+            me, alpha = self.write_mesh_data(entities=entities, name=name,
+                                             default_material=default_material)
 
-        for group in entities.groups:
-            if group.hidden:
-                continue
-            if self.layers_skip and group.layer in self.layers_skip:
-                continue
-            temp_ob = bpy.data.objects.new(group.name, None)
-            gname = "G-" + group_safe_name(temp_ob.name)
-            if DEBUG:
-                print(f"     Grp: {gname} in {ob.name}")
-            self.write_entities(group.entities,
-                                gname,
-                                parent_transform @ Matrix(group.transform),
-                                default_material=inherent_default_mat(
-                                    group.material, default_material),
-                                etype=EntityType.group,
-                                parent_name=ob.name,
-                                parent_location=nested_location)
-
-        for instance in entities.instances:
-            if instance.hidden:
-                continue
-            if self.layers_skip and instance.layer in self.layers_skip:
-                continue
-            mat_name = inherent_default_mat(instance.material,
-                                            default_material)
-            cdef = self.skp_components[instance.definition.name]
-            if instance.name == "":
-                cname = "C-" + cdef.name
+            # If there are no further nested groups or components, then we
+            # can create an object containing the mesh. Otherwise we create
+            # a new empty object and place an object containing the loose
+            # geometry as a mesh within this group.
+            nested_count = entities.NumGroups() + entities.NumInstances()
+            hide_empty = False
+            if nested_count == 0 or name == "_(Loose Entity)":
+                ob = bpy.data.objects.new(name, me)
+                ob.matrix_world = parent_transform
+                if 0.01 < alpha < 1.0:
+                    ob.show_transparent = True
             else:
-                cname = instance.name + " (C-" + cdef.name + ")"
-            if DEBUG:
-                print(f"     Cmp: {cname} in {ob.name}")
-            self.write_entities(cdef.entities,
-                                cname,
-                                parent_transform @ Matrix(instance.transform),
-                                default_material=mat_name,
-                                etype=EntityType.component,
-                                parent_name=ob.name,
-                                parent_location=nested_location)
+                ob = bpy.data.objects.new(name, None)  # empty to hold group
+                ob.matrix_world = parent_transform
+                #ob.hide_viewport = True  # disable empties in viewport
+                hide_empty = True
+                if me:
+                    ob_mesh = bpy.data.objects.new(
+                        "_" + name + " (Loose Mesh)", me)
+                    ob_mesh.matrix_world = parent_transform
+                    if 0.01 < alpha < 1.0:
+                        ob_mesh.show_transparent = True
+                    ob_mesh.parent = ob
+                    ob_mesh.location = Vector((0, 0, 0))
+                    bpy.context.collection.objects.link(ob_mesh)
+
+            # Nested adjustments to the world matrix
+            loc = ob.location
+            nested_location = Vector((loc[0], loc[1], loc[2]))
+
+            # Nest the object by assigning it to the parent object
+            if parent_name is not None and parent_name != "_(Loose Entity)":
+                ob.parent = bpy.data.objects[parent_name]
+                ob.location -= parent_location
+            if nested_count > 0:
+                ob.rotation_mode = 'QUATERNION'  # change from default xyz
+                ob.rotation_quaternion = Vector((1, 0, 0, 0))
+                ob.scale = Vector((1, 1, 1))
+            bpy.context.collection.objects.link(ob)
+            ob.hide_set(hide_empty)  # enable but do not show empties
+
+            # Child transforms are composed with mathutils, which multiplies
+            # the 4x4 matrices in C. A numpy 3x4 affine product per node
+            # would save four multiplies but cost far more in per call
+            # overhead.
+            children = []
+            for group in self._visible(entities.groups):
+                if group.hidden:
+                    continue
+                children.append((group.entities, None, group,
+                                 parent_transform @ self._matrix(group),
+                                 inherent_default_mat(group.material,
+                                                      default_material),
+                                 EntityType.group, ob.name, nested_location))
+
+            for instance in self._visible(entities.instances):
+                if instance.hidden:
+                    continue
+                mat_name = inherent_default_mat(instance.material,
+                                                default_material)
+                cdef = self.skp_components[instance.definition.name]
+                if instance.name == "":
+                    cname = "C-" + cdef.name
+                else:
+                    cname = instance.name + " (C-" + cdef.name + ")"
+                children.append((cdef.entities, cname, None,
+                                 parent_transform @ self._matrix(instance),
+                                 mat_name, EntityType.component, ob.name,
+                                 nested_location))
+
+            # Reversed so the first child is written first, as before
+            stack.extend(reversed(children))
 
     def instance_object_or_group(self,
                                  name,
                                  default_material):
+        key = self._key(name, default_material)
         try:
-            group = self.group_written[(name, default_material)]
+            group = self.group_written[key]
             ob = bpy.data.objects.new(name=name, object_data=None)
             ob.instance_type = 'COLLECTION'
             ob.instance_collection = group
             ob.empty_display_size = 0.01
             return ob
         except KeyError as _e:
-            me, alpha = self.component_meshes[(name, default_material)]
+            me, alpha = self.component_meshes[key]
             ob = bpy.data.objects.new(name, me)
             if alpha:
                 ob.show_transparent = True
-            me.update(calc_edges=True)
             return ob
 
     def component_def_as_group(self,
@@ -775,63 +932,115 @@ class SceneImporter():
                                etype=None,
                                group=None):
 
-        if etype == EntityType.outer:
-            if (name, default_material) in self.component_skip:
-                return
-            else:
-                if DEBUG:
-                    skp_log("Write instance definition as group {} {}".format(
-                        group.name, default_material))
-                self.component_skip[(name, default_material)] = True
-        if etype == EntityType.component and (
-                name, default_material) in self.component_skip:
-            ob = self.instance_object_or_group(name, default_material)
-            ob.matrix_world = parent_transform
-            self.context.collection.objects.link(ob)
-            try:
-                ob.layers = 18 * [False] + [True] + [False]
-            except:
-                pass  # capture AttributeError
-            group.objects.link(ob)
-            return
-        else:
-            me, alpha = self.write_mesh_data(entities=entities, name=name,
-                                             default_material=default_material)
-        if me:
-            ob = bpy.data.objects.new(name, me)
-            ob.matrix_world = parent_transform
-            if alpha:
-                ob.show_transparent = True
-            me.update(calc_edges=True)
-            self.context.collection.objects.link(ob)
-            try:
-                ob.layers = 18 * [False] + [True] + [False]
-            except:
-                pass  # capture AttributeError
-            group.objects.link(ob)
-        for g in entities.groups:
-            if self.layers_skip and g.layer in self.layers_skip:
+        link = self.context.collection.objects.link
+        # Nested entities are taken depth first from an explicit stack
+        # rather than by recursion, like in write_entities
+        stack = [(entities, name, parent_transform, default_material, etype)]
+        while stack:
+            (entities, name, parent_transform, default_material,
+             etype) = stack.pop()
+            key = self._key(name, default_material)
+            if etype == EntityType.outer:
+                if key in self.component_skip:
+                    continue
+                else:
+                    if DEBUG:
+                        skp_log("Write instance definition as group {} {}"
+                                .format(group.name, default_material))
+                    self.component_skip[key] = True
+            if etype == EntityType.component and key in self.component_skip:
+                ob = self.instance_object_or_group(name, default_material)
+                ob.matrix_world = parent_transform
+                link(ob)
+                if _LEGACY_LAYERS:
+                    ob.layers = _LEGACY_LAYERS
+                group.objects.link(ob)
                 continue
-            self.component_def_as_group(
-                g.entities,
-                "G-" + g.name,
-                parent_transform @ Matrix(g.transform),
-                default_material=inherent_default_mat(g.material,
+            else:
+                me, alpha = self.write_mesh_data(
+                    entities=entities, name=name,
+                    default_material=default_material)
+            if me:
+                ob = bpy.data.objects.new(name, me)
+                ob.matrix_world = parent_transform
+                if alpha:
+                    ob.show_transparent = True
+                link(ob)
+                if _LEGACY_LAYERS:
+                    ob.layers = _LEGACY_LAYERS
+                group.objects.link(ob)
+            # Sibling groups without nested entities are static geometry
+            # inside the instanced collection, so they are written as one
+            # merged mesh
+            groups = []
+            leaves = []
+            for g in self._visible(entities.groups):
+                ge = g.entities
+                if ge.NumGroups() + ge.NumInstances() == 0:
+                    if ge.NumFaces():
+                        leaves.append(g)
+                else:
+                    groups.append(g)
+            if len(leaves) == 1:
+                groups.extend(leaves)
+            elif leaves:
+                me = self.write_merged_groups(leaves, name, default_material)
+                if me:
+                    ob = bpy.data.objects.new(
+                        "_" + name + " (Merged Groups)", me)
+                    ob.matrix_world = parent_transform
+                    link(ob)
+                    if _LEGACY_LAYERS:
+                        ob.layers = _LEGACY_LAYERS
+                    group.objects.link(ob)
+            children = []
+            for g in groups:
+                children.append((g.entities,
+                                 "G-" + g.name,
+                                 parent_transform @ self._matrix(g),
+                                 inherent_default_mat(g.material,
                                                       default_material),
-                etype=EntityType.group,
-                group=group)
-        for instance in entities.instances:
-            if self.layers_skip and instance.layer in self.layers_skip:
-                continue
-            cdef = self.skp_components[instance.definition.name]
-            self.component_def_as_group(
-                cdef.entities,
-                cdef.name,
-                parent_transform @ Matrix(instance.transform),
-                default_material=inherent_default_mat(instance.material,
+                                 EntityType.group))
+            for instance in self._visible(entities.instances):
+                cdef = self.skp_components[instance.definition.name]
+                children.append((cdef.entities,
+                                 cdef.name,
+                                 parent_transform @ self._matrix(instance),
+                                 inherent_default_mat(instance.material,
                                                       default_material),
-                etype=EntityType.component,
-                group=group)
+                                 EntityType.component))
+            stack.extend(reversed(children))
+
+    #
+    # Write the leaf groups of a definition as a single mesh, each group's
+    # faces moved by its own transform. Cached per definition, like the
+    # meshes of write_mesh_data.
+    #
+    def write_merged_groups(self,
+                            groups,
+                            name,
+                            default_material='Material'):
+
+        # Keyed on the groups themselves (Group compares by SketchUp handle):
+        # every instance of a definition shares them, but unnamed parents in
+        # different definitions share only the "G-" display name
+        merged_key = (tuple(groups), default_material)
+        if merged_key in self._merged_meshes:
+            return self._merged_meshes[merged_key]
+        parts = []
+        for g in groups:
+            arrays = self._build_mesh_arrays(
+                g.entities, inherent_default_mat(g.material,
+                                                 default_material))
+            if arrays is not None:
+                parts.append((arrays, np.array(self._matrix(g))))
+        me = None
+        if parts:
+            me, _alpha = self._commit_mesh_arrays(
+                "_" + name + " (Merged Groups)", merge_mesh_arrays(parts))
+        self._merged_meshes[merged_key] = me
+
+        return me
 
     #
     # Creates a single group in a collection that contains duplicated
@@ -842,31 +1051,25 @@ class SceneImporter():
     def instance_group_dupli_vert(self,
                                   name,
                                   default_material,
-                                  component_stats):
+                                  transforms):
 
         def get_orientations(v):
-            orientations = defaultdict(list)
-            for transform in v:
-                loc, rot, scale = Matrix(transform).decompose()
-                scale = (scale[0], scale[1], scale[2])
-                rot = (rot[0], rot[1], rot[2], rot[3])
-                orientations[(scale, rot)].append((loc[0], loc[1], loc[2]))
-            for key, locs in orientations.items():
-                scale, rot = key
-                yield scale, rot, locs
+            scales, rots = decompose_basis(v)
+            for idx in bucket_rows(np.hstack((scales, rots.reshape(-1, 9)))):
+                rot = Matrix(rots[idx[0]].tolist()).to_quaternion()
+                yield (tuple(scales[idx[0]].tolist()), tuple(rot),
+                       v[idx, :3, 3])
 
         # Create a new group with duplicated components as a linked object.
         # Each duplicated group has a specific location, scale and rotation
         # applied.
-        for scale, rot, locs in get_orientations(
-                component_stats[(name, default_material)]):
-            verts = []
+        link = self.context.collection.objects.link
+        for scale, rot, locs in get_orientations(transforms):
             main_loc = Vector(locs[0])
-            for c in locs:
-                verts.append(Vector(c) - main_loc)
+            verts = locs - locs[0]  # relative to the dupli parent
             dme = bpy.data.meshes.new("DUPLI-" + name)
             dme.vertices.add(len(verts))
-            dme.vertices.foreach_set("co", unpack_list(verts))
+            dme.vertices.foreach_set("co", verts.reshape(-1))
             dme.update(calc_edges=True)  # update mesh with new data
             dme.validate()
             dob = bpy.data.objects.new("DUPLI-" + name, dme)
@@ -878,8 +1081,8 @@ class SceneImporter():
             ob.rotation_quaternion = Quaternion((rot[0], rot[1], rot[2],
                                                  rot[3]))
             ob.parent = dob
-            self.context.collection.objects.link(ob)
-            self.context.collection.objects.link(dob)
+            link(ob)
+            link(dob)
             skp_log(f"Complex group {name} {default_material} instanced "
                     f"{len(verts)} times, scale -> {scale}, rot -> {rot}")
         return
@@ -887,42 +1090,38 @@ class SceneImporter():
     def instance_group_dupli_face(self,
                                   name,
                                   default_material,
-                                  component_stats):
+                                  transforms):
 
         def get_orientations(v):
-            orientations = defaultdict(list)
-            for transform in v:
-                _loc, _rot, scale = Matrix(transform).decompose()
-                scale = (scale[0], scale[1], scale[2])
-                orientations[scale].append(transform)
-            for scale, transforms in orientations.items():
-                yield scale, transforms
-
-        for _scale, transforms in get_orientations(
-                component_stats[(name, default_material)]):
-            main_loc, _real_rot, real_scale = Matrix(transforms[0]).decompose()
-            verts = []
-            faces = []
-            f_count = 0
-            for c in transforms:
-                l_loc, l_rot, _l_scale = Matrix(c).decompose()
-                mat = Matrix.Translation(l_loc) * l_rot.to_matrix().to_4x4()
-                verts.append(Vector(
-                    (mat * Vector((-0.05, -0.05, 0, 1.0)))[0:3]) - main_loc)
-                verts.append(Vector(
-                    (mat * Vector((0.05, -0.05, 0, 1.0)))[0:3]) - main_loc)
-                verts.append(Vector(
-                    (mat * Vector((0.05, 0.05, 0, 1.0)))[0:3]) - main_loc)
-                verts.append(Vector(
-                    (mat * Vector((-0.05, 0.05, 0, 1.0)))[0:3]) - main_loc)
-                faces.append(
-                    (f_count + 0, f_count + 1, f_count + 2, f_count + 3))
-                f_count += 4
+            scales, rots = decompose_basis(v)
+            for idx in bucket_rows(scales):
+                yield scales[idx[0]], rots[idx], v[idx, :3, 3]
+
+        link = self.context.collection.objects.link
+        for real_scale, rots, locs in get_orientations(transforms):
+            # Each instance without its scale: rotation and location only
+            f_count = len(locs)
+            rigid = np.zeros((f_count, 4, 4), dtype=np.float32)
+            rigid[:, :3, :3] = rots
+            rigid[:, :3, 3] = locs
+            rigid[:, 3, 3] = 1.0
+            main_loc = Vector(locs[0])
+
+            # Place the quad corners of every instance in one contraction
+            verts = np.einsum('nij,jk->nki', rigid,
+                              _DUPLI_FACE_CORNERS)[:, :, :3]
+            verts -= locs[0]
             dme = bpy.data.meshes.new("DUPLI-" + name)
-            dme.vertices.add(len(verts))
-            dme.vertices.foreach_set('co', unpack_list(verts))
-            dme.tessfaces.add(f_count / 4)
-            dme.tessfaces.foreach_set('vertices_raw', unpack_face_list(faces))
+            dme.vertices.add(4 * f_count)
+            dme.vertices.foreach_set('co', verts.reshape(-1))
+            dme.loops.add(4 * f_count)
+            dme.loops.foreach_set('vertex_index',
+                                  np.arange(4 * f_count, dtype=np.int32))
+            dme.polygons.add(f_count)
+            dme.polygons.foreach_set('loop_start', np.arange(
+                0, 4 * f_count, 4, dtype=np.int32))
+            dme.polygons.foreach_set('loop_total',
+                                     np.full(f_count, 4, dtype=np.int32))
             dme.update(calc_edges=True)  # Update mesh with new data
             dme.validate()
             dob = bpy.data.objects.new("DUPLI-" + name, dme)
@@ -931,12 +1130,12 @@ class SceneImporter():
             #dob.use_dupli_faces_scale = True
             #dob.dupli_faces_scale = 10
             ob = self.instance_object_or_group(name, default_material)
-            ob.scale = real_scale
+            ob.scale = tuple(real_scale.tolist())
             ob.parent = dob
-            self.context.collection.objects.link(ob)
-            self.context.collection.objects.link(dob)
+            link(ob)
+            link(dob)
             skp_log("Complex group {} {} instanced {} times".format(
-                name, default_material, f_count / 4))
+                name, default_material, f_count))
         return
 
     def write_camera(self,
@@ -947,15 +1146,15 @@ class SceneImporter():
         bpy.ops.object.add(type='CAMERA', location=pos)
         ob = self.context.object
         ob.name = "Cam: " + name
-        z = (Vector(pos) - Vector(target))
-        x = Vector(up).cross(z)
-        y = z.cross(x)
-        x.normalize()
-        y.normalize()
-        z.normalize()
-        ob.matrix_world.col[0] = x.resized(4)
-        ob.matrix_world.col[1] = y.resized(4)
-        ob.matrix_world.col[2] = z.resized(4)
+        # Camera basis as columns of one matrix, built in a single pass
+        mat = np.identity(4)
+        mat[:3, 3] = pos
+        mat[:3, 2] = mat[:3, 3] - target
+        mat[:3, 0] = np.cross(up, mat[:3, 2])
+        mat[:3, 1] = np.cross(mat[:3, 2], mat[:3, 0])
+        norms = np.linalg.norm(mat[:3, :3], axis=0)
+        mat[:3, :3] /= np.where(norms > 0.0, norms, 1.0)  # like normalize()
+        ob.matrix_world = Matrix(mat.tolist())
         cam = ob.data
         aspect_ratio = camera.aspect_ratio
         fov = camera.fov
@@ -1098,6 +1297,118 @@ class ExportSKP(Operator, ExportHelper):
             .save(context, **keywords)
 
 
+# Patterns used by the 3D Warehouse operators, compiled once at load
+_MODEL_ID_RE = re.compile(
+    r'https?://3dwarehouse\.sketchup\.com/model/([0-9a-fA-F\-]{30,36})/')
+_SVER_RE = re.compile(r's(\d{1,2})')  # SKP binary keys, e.g. 's23'
+_SKP_VER_RE = re.compile(r's(\d+)\Z')  # SKP names in binaryNames
+_COLLECTION_ID_RE = re.compile(
+    r'https?://3dwarehouse\.sketchup\.com/collection/([0-9a-fA-F\-]{30,36})/')
+_SLUG_STRIP_RE = re.compile(r'[^a-zA-Z0-9\- _]+')
+
+# Thumbnail binaries by preference: large webp/jpg then small then tiny,
+# *_ao variants only when nothing else is there
+_THUMB_PRIORITY = ('bot_lt_wp', 'bot_lt', 'bot_st_wp', 'bot_st', 'bot_tt_wp', 'bot_tt',
+                   'bot_lt_wp_ao', 'bot_lt_ao', 'bot_st_wp_ao', 'bot_st_ao',
+                   'bot_tt_wp_ao', 'bot_tt_ao')
+
+# Pixel size thumbnails are picked and downscaled for, previews never
+# draw them larger
+_THUMB_SIZE = 256
+
+
+def _thumb_width_rank(entry):
+    """Sort key of a thumbnail binary, lowest is the one to download"""
+    width = entry.get('width')
+    if not isinstance(width, int):
+        width = 9999
+    return (width < _THUMB_SIZE, width if width >= _THUMB_SIZE else -width)
+
+
+# Request headers shared by every call, read-only so a cookie is always
+# added to a copy
+_WH_BROWSER_UA = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+_WH_API_HEADERS = MappingProxyType({
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': 'application/json',
+    'Referer': 'https://3dwarehouse.sketchup.com/',
+})
+_WH_COLLECTION_HEADERS = MappingProxyType({
+    'User-Agent': _WH_BROWSER_UA,
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://3dwarehouse.sketchup.com/',
+    'Sec-Fetch-Dest': 'empty',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'same-site'
+})
+_WH_THUMB_HEADERS = MappingProxyType({'User-Agent': 'Mozilla/5.0'})
+_WH_IMPORTER_HEADERS = MappingProxyType({'User-Agent': 'Blender-SKP-Importer'})
+
+# Downloads are copied to disk in 1 MiB chunks, not copyfileobj's default
+_COPY_BUFSIZE = 1 << 20
+
+_META_CACHE_TTL = 3600  # seconds a cached entity JSON stays valid
+
+_http_session = None  # requests.Session, created on first request
+
+
+def _session():
+    """
+    :return: shared requests.Session, so searches, thumbnails and downloads
+             against the warehouse hosts reuse pooled keep-alive connections
+    """
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        # Sized for the thumbnail pool, gateway errors are retried
+        session.mount('https://', HTTPAdapter(
+            pool_connections=4, pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=(502, 503, 504))))
+        _http_session = session
+    return _http_session
+
+
+def _http_get(url, headers, timeout):
+    """
+    GET url through the shared session (urllib when requests is missing).
+    :return: (status, body bytes); HTTP error statuses are raised as
+             urllib.error.HTTPError either way
+    """
+    if requests is None:
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read()
+    r = _session().get(url, headers=headers, timeout=timeout)
+    if r.status_code >= 400:
+        raise urllib.error.HTTPError(url, r.status_code, r.reason, r.headers,
+                                     io.BytesIO(r.content))
+    return r.status_code, r.content
+
+
+def _download_to_file(url, headers, file_path, timeout):
+    """
+    Stream url to file_path, with requests when available (urllib otherwise).
+    HTTP error statuses are raised as urllib.error.HTTPError either way.
+    """
+    if requests is None:
+        req = urllib.request.Request(url, headers=headers, method='GET')
+        with urllib.request.urlopen(req, timeout=timeout) as resp, \
+                open(file_path, 'wb', buffering=_COPY_BUFSIZE) as f:
+            shutil.copyfileobj(resp, f, _COPY_BUFSIZE)
+        return
+    with _session().get(url, headers=headers, stream=True,
+                        timeout=timeout) as r:
+        if r.status_code >= 400:
+            raise urllib.error.HTTPError(url, r.status_code, r.reason,
+                                         r.headers, None)
+        r.raw.decode_content = True  # undo any gzip transfer encoding
+        with open(file_path, 'wb', buffering=_COPY_BUFSIZE) as f:
+            shutil.copyfileobj(r.raw, f, _COPY_BUFSIZE)
+
+
 class ImportSketchupWarehouseGLB(Operator):
     """Import a SketchUp 3D Warehouse model via its URL.
     Attempts to download latest SKP (highest sXX). Falls back to GLB if SKP is restricted (401) and fallback enabled.
@@ -1106,6 +1417,25 @@ class ImportSketchupWarehouseGLB(Operator):
     bl_label = 'Import SketchUp 3D Warehouse (.skp/.glb)'
     bl_options = {'REGISTER', 'UNDO'}
 
+    # Header sets tried in turn for every SKP url, built once with the class
+    _UA = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+           '(KHTML, like Gecko) Chrome/127.0.0.1 Safari/537.36')
+    _BASE_HEADERS = {
+        'User-Agent': _UA,
+        'Accept': 'application/octet-stream,application/vnd.sketchup.skp,*/*',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Referer': 'https://3dwarehouse.sketchup.com/',
+        'Connection': 'keep-alive',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'same-origin'
+    }
+    _ALT_HEADERS = {
+        'User-Agent': _UA,
+        'Accept': '*/*',
+        'Referer': 'https://3dwarehouse.sketchup.com/',
+    }
+
     warehouse_url: StringProperty(
         name="3D Warehouse URL",
         description="URL like https://3dwarehouse.sketchup.com/model/{model_id}/{model_name} or direct download-warehouse URL",
@@ -1133,28 +1463,40 @@ class ImportSketchupWarehouseGLB(Operator):
 
     @staticmethod
     def _extract_model_id(url: str):
-        pattern = r'https?://3dwarehouse\.sketchup\.com/model/([0-9a-fA-F\-]{30,36})/'
-        m = re.match(pattern, url.strip())
+        m = _MODEL_ID_RE.match(url.strip())
         if not m:
             return None
         return m.group(1)
 
     @staticmethod
     def _fetch_json(model_id: str):
+        # Entity JSON is kept on disk for an hour so repeat imports of the
+        # same model skip the round trip
+        cache_path = os.path.join(tempfile.gettempdir(), f'skp_wh_meta_{model_id}.json')
+        try:
+            if time.time() - os.path.getmtime(cache_path) < _META_CACHE_TTL:
+                with open(cache_path, 'rb') as f:
+                    return _json_loads(f.read())
+        except (OSError, ValueError):
+            pass  # missing, unreadable or partly written cache entry
         api_url = f'https://3dwarehouse.sketchup.com/warehouse/v1.0/entities/{model_id}'
-        req = urllib.request.Request(api_url, headers={'User-Agent': 'Blender-SKP-Importer'})
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            if resp.status != 200:
-                raise RuntimeError(f'HTTP {resp.status} while fetching entity JSON')
-            data = resp.read().decode('utf-8', errors='replace')
-            return json.loads(data)
+        status, raw = _http_get(api_url, _WH_IMPORTER_HEADERS, 30)
+        if status != 200:
+            raise RuntimeError(f'HTTP {status} while fetching entity JSON')
+        data = _json_loads(raw)
+        try:
+            with open(cache_path, 'wb') as f:
+                f.write(raw)
+        except OSError:
+            pass
+        return data
 
     @staticmethod
     def _extract_latest_skp_versions(data: dict):
         binaries = data.get('binaries', {})
         versions = []
         for key in binaries.keys():
-            m = re.fullmatch(r's(\d{1,2})', key)
+            m = _SVER_RE.fullmatch(key)
             if m:
                 try:
                     versions.append(int(m.group(1)))
@@ -1172,45 +1514,28 @@ class ImportSketchupWarehouseGLB(Operator):
         last_error = None
         temp_dir = tempfile.mkdtemp(prefix='skp_wh_')
         file_path = os.path.join(temp_dir, f'{model_id}_{version_key}.skp')
-        ua = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-              '(KHTML, like Gecko) Chrome/127.0.0.1 Safari/537.36')
-        base_headers_primary = {
-            'User-Agent': ua,
-            'Accept': 'application/octet-stream,application/vnd.sketchup.skp,*/*',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://3dwarehouse.sketchup.com/',
-            'Connection': 'keep-alive',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'same-origin'
-        }
-        alt_headers = {
-            'User-Agent': ua,
-            'Accept': '*/*',
-            'Referer': 'https://3dwarehouse.sketchup.com/',
-        }
+        base_headers_primary = ImportSketchupWarehouseGLB._BASE_HEADERS
+        alt_headers = ImportSketchupWarehouseGLB._ALT_HEADERS
         if cookie:
-            base_headers_primary['Cookie'] = cookie
-            alt_headers['Cookie'] = cookie
+            base_headers_primary = {**base_headers_primary, 'Cookie': cookie}
+            alt_headers = {**alt_headers, 'Cookie': cookie}
         for u in urls:
             if not u:
                 continue
             for attempt, headers in enumerate((base_headers_primary, alt_headers), start=1):
-                skp_log(f"Attempt {attempt} (urllib) SKP {version_key}: {u}")
+                skp_log(f"Attempt {attempt} SKP {version_key}: {u}")
                 try:
                     if os.path.exists(file_path):
                         try: os.remove(file_path)
                         except Exception: pass
-                    req = urllib.request.Request(u, headers=headers, method='GET')
-                    with urllib.request.urlopen(req, timeout=180) as resp, open(file_path, 'wb') as f:
-                        shutil.copyfileobj(resp, f)
+                    _download_to_file(u, headers, file_path, 180)
                     size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
                     if size == 0:
                         raise IOError('Empty file downloaded')
-                    skp_log(f"Downloaded (urllib) {version_key} -> {file_path} ({size} bytes)")
+                    skp_log(f"Downloaded {version_key} -> {file_path} ({size} bytes)")
                     return file_path, None
                 except urllib.error.HTTPError as he:
-                    skp_log(f"HTTPError (urllib) {version_key} [{he.code}]: {he.reason}")
+                    skp_log(f"HTTPError {version_key} [{he.code}]: {he.reason}")
                     last_error = he
                     if he.code in (301,302,303,307,308):
                         # Redirect handled automatically, continue
@@ -1221,11 +1546,11 @@ class ImportSketchupWarehouseGLB(Operator):
                     # Other HTTP errors: break to next URL
                     break
                 except Exception as e:
-                    skp_log(f"Error (urllib) {version_key}: {e}")
+                    skp_log(f"Error {version_key}: {e}")
                     last_error = e
                     # Try alt headers then move on
                     continue
-            # Fallback to wget after urllib failures
+            # Fallback to wget after the direct download failed
             skp_log(f"Falling back to wget for {version_key}: {u}")
             try:
                 if os.path.exists(file_path):
@@ -1235,6 +1560,7 @@ class ImportSketchupWarehouseGLB(Operator):
                 if cookie:
                     skp_log("Skipping wget fallback due to cookie usage.")
                     continue
+                import wget  # only needed for this last resort
                 wget.download(u, out=file_path, bar=None)
                 size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
                 if size == 0:
@@ -1255,11 +1581,10 @@ class ImportSketchupWarehouseGLB(Operator):
     @staticmethod
     def _download_glb(glb_url: str, model_id: str):
         skp_log(f"Attempting GLB download: {glb_url}")
-        req = urllib.request.Request(glb_url, headers={'User-Agent': 'Blender-SKP-Importer'})
         temp_dir = tempfile.mkdtemp(prefix='skp_wh_')
         glb_path = os.path.join(temp_dir, f'{model_id}.glb')
-        with urllib.request.urlopen(req, timeout=120) as resp, open(glb_path, 'wb') as f:
-            shutil.copyfileobj(resp, f)
+        _download_to_file(glb_url, _WH_IMPORTER_HEADERS,
+                          glb_path, 120)
         skp_log(f"Downloaded GLB to: {glb_path}")
         return glb_path
 
@@ -1300,19 +1625,16 @@ class ImportSketchupWarehouseGLB(Operator):
         # Gather version numbers (regenerated URLs) and also original JSON urls for fallback
         version_nums = self._extract_latest_skp_versions(data)
         binaries = data.get('binaries', {})
-        # Build ordered list of download attempts: regenerated sXX first, then JSON provided url/contentUrl for each sXX
-        attempt_map = []
+        # Build ordered download attempts per sXX key: regenerated url first, then JSON provided url/contentUrl
+        attempt_map = {}
         for v in version_nums:
-            regen_url = self._build_skp_url(model_id, v)
-            attempt_map.append((f's{v}', [regen_url]))
+            attempt_map[f's{v}'] = [self._build_skp_url(model_id, v)]
         for key, val in binaries.items():
-            if re.fullmatch(r's(\d{1,2})', key) and isinstance(val, dict):
-                json_urls = []
-                if val.get('url'): json_urls.append(val['url'])
-                if val.get('contentUrl') and val['contentUrl'] not in json_urls:
-                    json_urls.append(val['contentUrl'])
-                if json_urls:
-                    attempt_map.append((key, json_urls))
+            if _SVER_RE.fullmatch(key) and isinstance(val, dict):
+                urls = attempt_map.setdefault(key, [])
+                for url in (val.get('url'), val.get('contentUrl')):
+                    if url and url not in urls:
+                        urls.append(url)
 
         glb_url = None
         glb_entry = binaries.get('glb') if isinstance(binaries.get('glb'), dict) else None
@@ -1321,12 +1643,10 @@ class ImportSketchupWarehouseGLB(Operator):
 
         skp_imported = False
         last_err = None
-        tried_versions = set()
 
-        for version_key, urls in attempt_map:
-            if version_key in tried_versions:
+        for version_key, urls in attempt_map.items():
+            if not urls:
                 continue
-            tried_versions.add(version_key)
             skp_path, err = self._attempt_download(urls, model_id, version_key, cookie)
             if skp_path:
                 try:
@@ -1364,17 +1684,71 @@ class ImportSketchupWarehouseGLB(Operator):
         return {'CANCELLED'}
 
 
+@dataclass(slots=True)
+class WhResult:
+    """One model of a 3D Warehouse result page, as shown in the browser"""
+    model_id: str
+    model_name: str
+    display_name: str
+    model_url: str
+    icon_id: int
+    skp_versions: tuple
+    restricted: bool
+    has_glb: bool
+    poly_count: Optional[int]
+    file_size: Optional[int]
+    file_size_fmt: str
+    skp_filename: str
+    preview_key: str = ''  # its thumbnail slot in _skp_wh_previews, if any
+
+
 # Global preview collection and result cache for 3D Warehouse browser
 _skp_wh_previews = None
-_skp_wh_results = []  # list of dicts: {model_id, model_name, model_url, icon_id}
+_skp_wh_results = []  # list of WhResult
 _skp_wh_last_query = ''  # track last query to reset offset when changed
 _skp_wh_enum_items = []  # dynamic enum items for gallery view
-_skp_wh_result_map = {}  # id -> result dict
+_skp_wh_enum_key = None  # (model id, icon id) pairs the items were built from
+_skp_wh_result_map = OrderedDict()  # id -> WhResult, oldest first
+_RESULT_MAP_SIZE = 200  # results (and preview slots) kept across pages
 # Added for paging
 _skp_wh_total_results = 0
 _skp_wh_total_pages = 0
 # Track last sort to reset page when changed
 _skp_wh_last_sort = ''
+# Parsed search responses by API url, least recently used first
+_skp_wh_search_cache = OrderedDict()
+_SEARCH_CACHE_SIZE = 32
+# Search URL per sort enum item with every constant parameter already
+# encoded, only the query and offset are filled in per search.
+# Note: personalizeSearch must be false when using explicit sortBy values
+_SEARCH_URL_TEMPLATES = {
+    key: ('https://embed-3dwarehouse.sketchup.com/warehouse/v1.0/entities'
+          '?sortBy=' + sort_expr.replace(' ', '%20') +
+          '&personalizeSearch=false&contentType=3dw&showBinaryAttributes=true'
+          '&showBinaryMetadata=true&showAttributes=true&show=all&recordEvent=false'
+          '&fq=binaryNames%3Dexists%3Dtrue&q={q}&offset={o}')
+    for key, sort_expr in (('POPULARITY', 'popularity desc'),
+                           ('DATE', 'createTime desc'),
+                           ('LIKES', 'reviewCount desc'))
+}
+_skp_wh_search_gen = 0  # bumped per search, older modal searches stop
+# Response fields the result list is built from, cached pages keep only these
+_SEARCH_TOTAL_KEYS = ('total', 'totalResults', 'resultCount', 'count', 'total_entities')
+_SEARCH_BINARY_KEYS = ('fileSize', 'originalFileName', 'contentUrl', 'url', 'ext', 'width')
+_skp_wh_thumb_dir = None  # thumbnail cache, kept across sessions
+_THUMB_CACHE_LIMIT = 100 << 20  # bytes kept before the oldest are evicted
+
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB')
+
+
+def _fmt_size(num):
+    """Human readable file size of num bytes, '—' when unknown"""
+    if not num:
+        return '—'
+    # Each unit is 10 more bits, so the bit length picks it without a loop
+    i = min(3, max(0, (int(num).bit_length() - 1) // 10))
+    return f"{num / (1 << (10 * i)):.1f}{_SIZE_UNITS[i]}" if i else f"{num}B"
 
 
 def _skp_wh_get_prefs():
@@ -1389,27 +1763,224 @@ def _skp_wh_ensure_previews():
     return _skp_wh_previews
 
 
-def _skp_wh_clear_previews():
-    global _skp_wh_previews, _skp_wh_results
-    if _skp_wh_previews:
-        for name in list(_skp_wh_previews.keys()):
-            try:
-                _skp_wh_previews.remove(name)
-            except Exception:
-                pass
+def _skp_wh_reset_results():
+    """
+    Start a new result page. Preview slots stay loaded so revisited models
+    reuse them, _skp_wh_remember_result bounds how many are kept.
+    """
+    global _skp_wh_results
     _skp_wh_results = []
 
 
-# Properties for search
-bpy.types.WindowManager.skp_wh_query = StringProperty(name="Search", default="chair")
-if not hasattr(bpy.types.WindowManager, 'skp_wh_offset'):
-    bpy.types.WindowManager.skp_wh_offset = IntProperty(name="Offset", default=0, min=0)
-# New page property (page index, 0-based)
-if not hasattr(bpy.types.WindowManager, 'skp_wh_page'):
-    bpy.types.WindowManager.skp_wh_page = IntProperty(name="Page", default=0, min=0, description="Result page (0-based)")
-# Sort options property
-if not hasattr(bpy.types.WindowManager, 'skp_wh_sort'):
-    bpy.types.WindowManager.skp_wh_sort = EnumProperty(
+def _skp_wh_drop_preview(preview_key):
+    # del, not pop(): only __delitem__ releases the decoded image
+    if preview_key and _skp_wh_previews is not None and preview_key in _skp_wh_previews:
+        del _skp_wh_previews[preview_key]
+
+
+def _skp_wh_remember_result(result):
+    """
+    Map result by model id. Past _RESULT_MAP_SIZE the oldest results are
+    forgotten along with their preview slots.
+    """
+    old = _skp_wh_result_map.pop(result.model_id, None)
+    if old is not None and old.preview_key != result.preview_key:
+        _skp_wh_drop_preview(old.preview_key)
+    _skp_wh_result_map[result.model_id] = result
+    while len(_skp_wh_result_map) > _RESULT_MAP_SIZE:
+        _mid, evicted = _skp_wh_result_map.popitem(last=False)
+        _skp_wh_drop_preview(evicted.preview_key)
+
+
+_THUMB_WORKERS = 12  # concurrent thumbnail downloads per result page
+
+
+def _skp_wh_rebuild_enum_items():
+    """
+    Rebuild the gallery enum items from _skp_wh_results in one pass. Runs
+    again whenever thumbnails arrive, since the items carry their icon ids.
+    :return: False when the results still match the current items
+    """
+    global _skp_wh_enum_items, _skp_wh_enum_key
+    key = tuple((r.model_id, r.icon_id) for r in _skp_wh_results)
+    if key == _skp_wh_enum_key:
+        return False
+    _skp_wh_enum_key = key
+    _skp_wh_enum_items = [
+        (r.model_id, r.display_name[:32] + ('…' if len(r.display_name) > 32 else ''),
+         r.model_url, r.icon_id, i)
+        for i, r in enumerate(r for r in _skp_wh_results if r.model_id)]
+    return True
+
+
+def _skp_wh_download_thumb(url, path):
+    """Download one thumbnail to path. Runs on a worker thread."""
+    # Written aside first so an interrupted download is never cached
+    part_path = path + '.part'
+    # Thumbnails are small, one read and one write beat a streamed copy
+    _status, body = _http_get(url, _WH_THUMB_HEADERS, 20)
+    with open(part_path, 'wb') as f:
+        f.write(body)
+    _skp_wh_store_thumb(part_path, path)
+
+
+def _skp_wh_store_thumb(part_path, path):
+    """Move a fully downloaded thumbnail into the cache at path"""
+    if Image is not None:
+        # Previews keep the decoded pixels, a 1024px image costs 16 times
+        # the memory of one at _THUMB_SIZE
+        try:
+            with Image.open(part_path) as img:
+                if max(img.size) > _THUMB_SIZE:
+                    fmt = img.format
+                    img.thumbnail((_THUMB_SIZE, _THUMB_SIZE), Image.BILINEAR)
+                    if fmt == 'JPEG':
+                        img.save(part_path, fmt, quality=80)
+                    else:
+                        img.save(part_path, fmt)
+        except Exception as e:
+            skp_log(f"Thumbnail downscale failed, keeping original: {e}")
+    os.replace(part_path, path)
+
+
+async def _skp_wh_fetch_thumbs(pending):
+    """
+    Download every thumbnail in one event loop, over one aiohttp session.
+    :param pending: list of (concurrent future, url, path); each future is
+                    resolved as soon as its own thumbnail is stored
+    """
+    connector = aiohttp.TCPConnector(limit=32, limit_per_host=16,
+                                     ttl_dns_cache=300)
+    async with aiohttp.ClientSession(
+            connector=connector, headers=_WH_THUMB_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=20)) as session:
+
+        async def fetch(future, url, path):
+            try:
+                async with session.get(url) as resp:
+                    resp.raise_for_status()
+                    body = await resp.read()
+                part_path = path + '.part'
+                with open(part_path, 'wb') as f:
+                    f.write(body)
+                await asyncio.to_thread(_skp_wh_store_thumb, part_path, path)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+
+        await asyncio.gather(*(fetch(*p) for p in pending))
+
+
+def _skp_wh_run_thumb_loop(pending):
+    """Run _skp_wh_fetch_thumbs on this worker thread"""
+    try:
+        asyncio.run(_skp_wh_fetch_thumbs(pending))
+    except Exception as e:
+        # The session itself failed, no waiting caller may be left hanging
+        for future, _url, _path in pending:
+            if not future.done():
+                future.set_exception(e)
+
+
+def _skp_wh_submit_thumbs(ex, jobs):
+    """
+    Start downloading the thumbnails of jobs on executor ex.
+    :param jobs: list of (WhResult, preview key, url, path)
+    :return: one future per job, None for thumbnails already in the cache
+    """
+    cached = [os.path.exists(path) and os.path.getsize(path) > 0
+              for _r, _k, _url, path in jobs]
+    if aiohttp is not None:
+        # A single worker runs the event loop for the whole page
+        futures = [None if hit else Future() for hit in cached]
+        pending = [(future, url, path) for future, (_r, _k, url, path)
+                   in zip(futures, jobs) if future is not None]
+        if pending:
+            ex.submit(_skp_wh_run_thumb_loop, pending)
+        return futures
+    if requests is not None:
+        _session()  # create the shared session before the workers use it
+    return [None if hit else ex.submit(_skp_wh_download_thumb, url, path)
+            for hit, (_r, _k, url, path) in zip(cached, jobs)]
+
+
+def _skp_wh_load_thumb(pcoll, job, future):
+    """
+    Load the thumbnail of a finished job into pcoll and set the icon_id
+    of its WhResult, 0 when the thumbnail failed. Main thread only, the
+    previews API is not thread safe.
+    """
+    result, preview_key, _url, path = job
+    try:
+        if future is not None:
+            future.result()
+        if preview_key not in pcoll:  # revisited models keep their slot
+            pcoll.load(preview_key, path, 'IMAGE')
+        result.icon_id = pcoll[preview_key].icon_id
+    except Exception:
+        result.icon_id = 0
+
+
+def _skp_wh_load_thumbs(pcoll, jobs):
+    """
+    Download thumbnails concurrently, then load them into pcoll in order.
+    :param jobs: list of (WhResult, preview key, url, path)
+    """
+    if not jobs:
+        return
+    with ThreadPoolExecutor(max_workers=_THUMB_WORKERS) as ex:
+        futures = _skp_wh_submit_thumbs(ex, jobs)
+    for job, future in zip(jobs, futures):
+        _skp_wh_load_thumb(pcoll, job, future)
+
+
+def _skp_wh_thumbs_dir():
+    """
+    :return: per-user directory caching thumbnails by model id across
+             sessions, or a temp directory when it cannot be created
+    """
+    global _skp_wh_thumb_dir
+    if _skp_wh_thumb_dir is None or not os.path.isdir(_skp_wh_thumb_dir):
+        try:
+            _skp_wh_thumb_dir = bpy.utils.user_resource(
+                'DATAFILES', path='skp_wh_thumbs', create=True)
+        except Exception:
+            _skp_wh_thumb_dir = ''
+        if not _skp_wh_thumb_dir or not os.path.isdir(_skp_wh_thumb_dir):
+            _skp_wh_thumb_dir = tempfile.mkdtemp(prefix='skp_wh_thumbs_')
+    return _skp_wh_thumb_dir
+
+
+def _skp_wh_evict_thumbs(limit=_THUMB_CACHE_LIMIT):
+    """Delete the oldest cached thumbnails until the cache fits in limit"""
+    cache_dir = _skp_wh_thumbs_dir()
+    try:
+        files = [e for e in os.scandir(cache_dir) if e.is_file()]
+    except OSError:
+        return
+    stats = sorted(((e.stat(), e.path) for e in files), key=lambda t: t[0].st_mtime)
+    total = sum(st.st_size for st, _path in stats)
+    for st, path in stats:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+            total -= st.st_size
+        except OSError:
+            pass
+
+
+def _skp_wh_register_props():
+    """Add the 3D Warehouse browser properties to the WindowManager"""
+    wm = bpy.types.WindowManager
+    # Properties for search
+    wm.skp_wh_query = StringProperty(name="Search", default="chair")
+    wm.skp_wh_offset = IntProperty(name="Offset", default=0, min=0)
+    # Page property (page index, 0-based)
+    wm.skp_wh_page = IntProperty(name="Page", default=0, min=0, description="Result page (0-based)")
+    # Sort options property
+    wm.skp_wh_sort = EnumProperty(
         name="Sort",
         description="Sort order for 3D Warehouse search",
         items=[
@@ -1419,18 +1990,21 @@ if not hasattr(bpy.types.WindowManager, 'skp_wh_sort'):
         ],
         default='POPULARITY'
     )
-# New URL input property
-if not hasattr(bpy.types.WindowManager, 'skp_wh_url'):
-    bpy.types.WindowManager.skp_wh_url = StringProperty(name="Warehouse URL", default="", description="Paste a 3D Warehouse URL for direct download or collection loading")
-# Thumbnail / view mode properties (re-added after refactor)
-if not hasattr(bpy.types.WindowManager, 'skp_wh_thumb_cols'):
-    bpy.types.WindowManager.skp_wh_thumb_cols = IntProperty(name="Cols", default=2, min=1, max=8, description="Grid columns")
-if not hasattr(bpy.types.WindowManager, 'skp_wh_thumb_scale'):
-    bpy.types.WindowManager.skp_wh_thumb_scale = FloatProperty(name="Scale", default=2.0, min=0.5, max=4.0, description="Grid thumbnail scale")
-if not hasattr(bpy.types.WindowManager, 'skp_wh_thumb_mode'):
-    bpy.types.WindowManager.skp_wh_thumb_mode = EnumProperty(name="Mode", items=[('GRID','Grid','Grid thumbnails'),('GALLERY','Gallery','Large gallery thumbnails')], default='GALLERY')
-if not hasattr(bpy.types.WindowManager, 'skp_wh_selected'):
-    bpy.types.WindowManager.skp_wh_selected = EnumProperty(name="Model", items=lambda self, ctx: _skp_wh_enum_items, description="Selected 3D Warehouse model")
+    # URL input property
+    wm.skp_wh_url = StringProperty(name="Warehouse URL", default="", description="Paste a 3D Warehouse URL for direct download or collection loading")
+    # Thumbnail / view mode properties
+    wm.skp_wh_thumb_cols = IntProperty(name="Cols", default=2, min=1, max=8, description="Grid columns")
+    wm.skp_wh_thumb_scale = FloatProperty(name="Scale", default=2.0, min=0.5, max=4.0, description="Grid thumbnail scale")
+    wm.skp_wh_thumb_mode = EnumProperty(name="Mode", items=[('GRID','Grid','Grid thumbnails'),('GALLERY','Gallery','Large gallery thumbnails')], default='GALLERY')
+    wm.skp_wh_selected = EnumProperty(name="Model", items=lambda self, ctx: _skp_wh_enum_items, description="Selected 3D Warehouse model")
+
+
+def _skp_wh_unregister_props():
+    wm = bpy.types.WindowManager
+    for prop in ('skp_wh_query', 'skp_wh_offset', 'skp_wh_page', 'skp_wh_sort', 'skp_wh_url',
+                 'skp_wh_thumb_cols', 'skp_wh_thumb_scale', 'skp_wh_thumb_mode', 'skp_wh_selected'):
+        if hasattr(wm, prop):
+            delattr(wm, prop)
 
 
 class SKPWH_OT_Search(Operator):
@@ -1443,19 +2017,8 @@ class SKPWH_OT_Search(Operator):
     page_delta: IntProperty(name='Page Delta', default=0)  # -1 prev, +1 next
 
     def _build_api_url(self, query: str, offset: int, sort_key: str) -> str:
-        from urllib.parse import quote
-        # Map internal sort enum to API sortBy expression
-        sort_map = {
-            'POPULARITY': 'popularity desc',
-            'DATE': 'createTime desc',
-            'LIKES': 'reviewCount desc',
-        }
-        sort_expr = sort_map.get(sort_key, 'popularity desc')
-        sort_param = sort_expr.replace(' ', '%20')
-    # Note: personalizeSearch must be false when using explicit sortBy values
-        base = ('https://embed-3dwarehouse.sketchup.com/warehouse/v1.0/entities'
-        f'?sortBy={sort_param}&personalizeSearch=false&contentType=3dw&showBinaryAttributes=true&showBinaryMetadata=true&showAttributes=true&show=all&recordEvent=false&fq=binaryNames%3Dexists%3Dtrue')
-        return f"{base}&q={quote(query)}&offset={offset}"
+        template = _SEARCH_URL_TEMPLATES.get(sort_key, _SEARCH_URL_TEMPLATES['POPULARITY'])
+        return template.format(q=quote(query), o=offset)
 
     def _parse_entities(self, data):
         # Now include 'entries' key from sample JSON
@@ -1469,20 +2032,17 @@ class SKPWH_OT_Search(Operator):
         return []
 
     def _slugify(self, name: str):
-        import re
-        slug = re.sub(r'[^a-zA-Z0-9\- _]+', '', (name or 'Model')).strip().replace(' ', '-')
+        slug = _SLUG_STRIP_RE.sub('', (name or 'Model')).strip().replace(' ', '-')
         return slug[:60] if slug else 'Model'
 
     def _pick_thumbnail_binary(self, binaries: dict):
-        # prefer large webp/jpg then small then tiny; avoid *_ao unless nothing else
-        primary_order = ['bot_lt_wp', 'bot_lt', 'bot_st_wp', 'bot_st', 'bot_tt_wp', 'bot_tt']
-        ao_order = ['bot_lt_wp_ao', 'bot_lt_ao', 'bot_st_wp_ao', 'bot_st_ao', 'bot_tt_wp_ao', 'bot_tt_ao']
-        for key in primary_order + ao_order:
-            entry = binaries.get(key)
-            if isinstance(entry, dict):
-                url = entry.get('url') or entry.get('contentUrl')
-                if url:
-                    return url, entry.get('originalFileName', '')
+        # Smallest image at least _THUMB_SIZE wide, else the widest one;
+        # entries without a width keep _THUMB_PRIORITY order
+        entry = min((e for e in map(binaries.get, _THUMB_PRIORITY)
+                     if isinstance(e, dict) and (e.get('url') or e.get('contentUrl'))),
+                    key=_thumb_width_rank, default=None)
+        if entry:
+            return entry.get('url') or entry.get('contentUrl'), entry.get('originalFileName', '')
         # fallback any image-like ext
         for k, entry in binaries.items():
             if isinstance(entry, dict):
@@ -1493,12 +2053,13 @@ class SKPWH_OT_Search(Operator):
                         return url, entry.get('originalFileName', '')
         return '', ''
 
-    def execute(self, context):
-        global _skp_wh_last_query, _skp_wh_total_results, _skp_wh_total_pages, _skp_wh_last_sort
+    def _prepare(self, context):
+        """:return: (api_url, headers) of the search to run, None if there is none"""
+        global _skp_wh_last_query, _skp_wh_total_pages, _skp_wh_last_sort
         query = context.window_manager.skp_wh_query.strip()
         if not query:
             self.report({'WARNING'}, 'Empty query')
-            return {'CANCELLED'}
+            return None
         wm = context.window_manager
         current_sort = wm.skp_wh_sort
         # Reset page if query or sort changed
@@ -1517,25 +2078,22 @@ class SKPWH_OT_Search(Operator):
         cookie = prefs.warehouse_cookie.strip() if prefs and getattr(prefs, 'warehouse_cookie', '') else ''
         api_url = self._build_api_url(query, offset, current_sort)
         skp_log(f"Warehouse API search URL: {api_url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0',
-            'Accept': 'application/json',
-            'Referer': 'https://3dwarehouse.sketchup.com/',
-        }
-        if cookie:
-            headers['Cookie'] = cookie
-        data = None
-        try:
-            with urllib.request.urlopen(urllib.request.Request(api_url, headers=headers), timeout=30) as resp:
-                raw = resp.read().decode('utf-8', errors='replace')
-            data = json.loads(raw)
-        except Exception as e:
-            self.report({'ERROR'}, f'API search failed: {e}')
-            return {'CANCELLED'}
+        headers = {**_WH_API_HEADERS, 'Cookie': cookie} if cookie else _WH_API_HEADERS
+        return api_url, headers
+
+    def _show_results(self, context, data):
+        """
+        Fill the result list from a search response.
+        :return: (preview collection, thumbnail jobs), (None, None) when
+                 nothing was found
+        """
+        global _skp_wh_total_results, _skp_wh_total_pages
+        wm = context.window_manager
+        current_sort = wm.skp_wh_sort
         # Try to extract total result count (varies by API response schema)
         total_candidates = []
         if isinstance(data, dict):
-            for k in ('total', 'totalResults', 'resultCount', 'count', 'total_entities'):
+            for k in _SEARCH_TOTAL_KEYS:
                 v = data.get(k)
                 if isinstance(v, int) and v >= 0:
                     total_candidates.append(v)
@@ -1543,13 +2101,14 @@ class SKPWH_OT_Search(Operator):
         _skp_wh_total_pages = math.ceil(_skp_wh_total_results / self.max_results) if _skp_wh_total_results else 0
         entries = self._parse_entities(data)
         if not entries:
-            _skp_wh_clear_previews()
+            _skp_wh_reset_results()
             self.report({'INFO'}, 'No models found')
-            return {'FINISHED'}
+            return None, None
         entries = entries[:self.max_results]
-        _skp_wh_clear_previews()
+        _skp_wh_reset_results()
         pcoll = _skp_wh_ensure_previews()
-        temp_dir = tempfile.mkdtemp(prefix='skp_wh_thumbs_')
+        temp_dir = _skp_wh_thumbs_dir()
+        thumb_jobs = []
         for ent in entries:
             mid = ent.get('id')
             name = ent.get('title') or ent.get('name') or 'Model'
@@ -1559,100 +2118,78 @@ class SKPWH_OT_Search(Operator):
             # Collect skp versions
             skp_versions = []
             for bname in (ent.get('binaryNames') or []):
-                if isinstance(bname, str) and re.fullmatch(r's\d+', bname):
-                    try:
-                        skp_versions.append(int(bname[1:]))
-                    except ValueError:
-                        pass
+                m = _SKP_VER_RE.match(bname) if isinstance(bname, str) else None
+                if m:
+                    skp_versions.append(int(m.group(1)))
             skp_versions.sort(reverse=True)
-            # Determine restricted (all available sXX have /restricted/ in contentUrl)
-            restricted = False
-            if skp_versions:
-                restricted_flags = []
-                for v in skp_versions:
-                    key = f's{v}'
-                    binfo = binaries.get(key)
-                    if isinstance(binfo, dict):
-                        c_url = binfo.get('contentUrl') or ''
-                        restricted_flags.append('/restricted/' in c_url)
-                if restricted_flags and all(restricted_flags):
-                    restricted = True
+            # Restricted (all available sXX have /restricted/ in contentUrl)
+            # and the file size of the highest version, in one pass
+            file_size = None
+            skp_filename = ''
+            got_size = False
+            any_binfo = False
+            all_restricted = True
+            for v in skp_versions:
+                binfo = binaries.get(f's{v}')
+                if not isinstance(binfo, dict):
+                    continue
+                any_binfo = True
+                if '/restricted/' not in (binfo.get('contentUrl') or ''):
+                    all_restricted = False
+                if not got_size:
+                    file_size = binfo.get('fileSize')
+                    skp_filename = binfo.get('originalFileName', '')
+                    got_size = bool(file_size)
+            restricted = any_binfo and all_restricted
             # Polygon count
             poly_count = None
             try:
                 poly_count = ent.get('attributes', {}).get('skp', {}).get('polygons', {}).get('value')
             except Exception:
                 poly_count = None
-            # File size from highest version skp binary
-            file_size = None
-            skp_filename = ''
-            if skp_versions:
-                for v in skp_versions:  # first (highest) available
-                    key = f's{v}'
-                    binfo = binaries.get(key)
-                    if isinstance(binfo, dict):
-                        file_size = binfo.get('fileSize')
-                        skp_filename = binfo.get('originalFileName', '')
-                        if file_size:
-                            break
-            def _fmt_size(num):
-                if not num:
-                    return '—'
-                for unit in ('B','KB','MB','GB'):
-                    if num < 1024 or unit == 'GB':
-                        return f"{num:.1f}{unit}" if unit != 'B' else f"{num}B"
-                    num /= 1024.0
             thumb_url, original_name = self._pick_thumbnail_binary(binaries)
-            icon_id = 0
-            if thumb_url:
-                # skp_log(f"Loading thumbnail for {mid}: {thumb_url}")
-                try:
-                    # enforce extension
-                    ext = os.path.splitext(thumb_url.split('?',1)[0])[1]
-                    if ext.lower() not in ('.jpg', '.jpeg', '.png', '.webp'):
-                        ext = '.jpg'
-                    # Use deterministic preview key that includes the model id to avoid collisions
-                    preview_key = f"skp_wh_{mid}{ext}"
-                    thumb_path = os.path.join(temp_dir, preview_key)
-                    with urllib.request.urlopen(urllib.request.Request(thumb_url, headers={'User-Agent': 'Mozilla/5.0'}), timeout=20) as ir, open(thumb_path, 'wb') as outf:
-                        shutil.copyfileobj(ir, outf)
-                    pcoll.load(preview_key, thumb_path, 'IMAGE')
-                    icon_id = pcoll[preview_key].icon_id
-                    # skp_log(f"Loaded thumbnail for {mid}: {preview_key}, icon_id={icon_id}")
-                except Exception as e:
-                    # skp_log(f"Failed to load thumbnail for {mid}: {e}")
-                    icon_id = 0
-            _skp_wh_results.append({
-                'model_id': mid,
-                'model_name': slug,
-                'display_name': name,
-                'model_url': model_url,
-                'icon_id': icon_id,
-                'skp_versions': skp_versions,
-                'restricted': restricted,
-                'has_glb': 'glb' in binaries,
-                'poly_count': poly_count,
-                'file_size': file_size,
-                'file_size_fmt': _fmt_size(file_size),
-                'skp_filename': skp_filename or ent.get('title') or ''
-            })
+            preview_key = ''
+            if thumb_url and mid:
+                # enforce extension
+                ext = os.path.splitext(thumb_url.split('?',1)[0])[1]
+                if ext.lower() not in ('.jpg', '.jpeg', '.png', '.webp'):
+                    ext = '.jpg'
+                # Use deterministic preview key that includes the model id to avoid collisions
+                preview_key = f"skp_wh_{mid}{ext}"
+            _skp_wh_results.append(WhResult(
+                model_id=mid,
+                model_name=slug,
+                display_name=name,
+                model_url=model_url,
+                icon_id=0,
+                skp_versions=tuple(skp_versions),
+                restricted=restricted,
+                has_glb='glb' in binaries,
+                poly_count=poly_count,
+                file_size=file_size,
+                file_size_fmt=_fmt_size(file_size),
+                skp_filename=skp_filename or ent.get('title') or '',
+                preview_key=preview_key
+            ))
+            if preview_key:
+                thumb_jobs.append((_skp_wh_results[-1], preview_key, thumb_url,
+                                   os.path.join(temp_dir, preview_key)))
             # Build enum item (identifier must be unique); use model_id
             if mid:
-                _skp_wh_result_map[mid] = _skp_wh_results[-1]
+                _skp_wh_remember_result(_skp_wh_results[-1])
         # skp_log(f"Preview collection has {len(pcoll)} items: {list(pcoll.keys())[:5]}")
         self.report({'INFO'}, f"Found {len(_skp_wh_results)} models (page {wm.skp_wh_page + 1}{' / ' + str(_skp_wh_total_pages) if _skp_wh_total_pages else ''}) | Sort: {current_sort}")
-        # Rebuild enum items after results
-        global _skp_wh_enum_items
-        _skp_wh_enum_items = []
-        for r in _skp_wh_results:
-            if r['model_id']:
-                name_disp = (r['display_name'][:32] + ('…' if len(r['display_name'])>32 else ''))
-                _skp_wh_enum_items.append((r['model_id'], name_disp, r['model_url'], r['icon_id'], len(_skp_wh_enum_items)))
+        return pcoll, thumb_jobs
+
+    def _refresh_enum(self, context, select):
+        # Rebuild enum items after results, nothing to redraw if unchanged
+        if not _skp_wh_rebuild_enum_items() and not select:
+            return
         # skp_log(f"Enum items: {len(_skp_wh_enum_items)}, sample: {[e[0] for e in _skp_wh_enum_items[:5]]}")
         # Ensure a valid selection exists after search so the UI shows thumbnails for the first result
         try:
             wm = context.window_manager
-            if _skp_wh_enum_items:
+            if select and _skp_wh_enum_items:
                 first_id = _skp_wh_enum_items[0][0]
                 wm.skp_wh_selected = first_id
                 # skp_log(f"Selected: {wm.skp_wh_selected}")
@@ -1671,9 +2208,180 @@ class SKPWH_OT_Search(Operator):
                 except Exception:
                     pass
                 break
-        
+
+    def _compact(self, data):
+        """
+        :return: data reduced to the result counts and the entity fields
+                 _show_results reads, so cached pages stay small
+        """
+        if not isinstance(data, (dict, list)):
+            return data
+        compact = {k: data[k] for k in _SEARCH_TOTAL_KEYS if k in data} if isinstance(data, dict) else {}
+        entries = []
+        for ent in self._parse_entities(data):
+            if not isinstance(ent, dict):
+                continue
+            binaries = ent.get('binaries')
+            if isinstance(binaries, dict):
+                binaries = {name: {k: b[k] for k in _SEARCH_BINARY_KEYS if k in b} if isinstance(b, dict) else b
+                            for name, b in binaries.items()}
+            polygons = None
+            try:
+                polygons = ent.get('attributes', {}).get('skp', {}).get('polygons', {}).get('value')
+            except Exception:
+                pass
+            entries.append({
+                'id': ent.get('id'),
+                'title': ent.get('title'),
+                'name': ent.get('name'),
+                'binaryNames': ent.get('binaryNames'),
+                'binaries': binaries,
+                'attributes': {'skp': {'polygons': {'value': polygons}}},
+            })
+        compact['entries'] = entries
+        return compact
+
+    def _cache_search(self, api_url, data):
+        """:return: the compacted data, now the most recent cache entry"""
+        data = self._compact(data)
+        _skp_wh_search_cache[api_url] = data
+        _skp_wh_search_cache.move_to_end(api_url)
+        if len(_skp_wh_search_cache) > _SEARCH_CACHE_SIZE:
+            _skp_wh_search_cache.popitem(last=False)
+        return data
+
+    @staticmethod
+    def _fetch_worker(q, api_url, headers):
+        # Runs on a background thread, hands the response to modal()
+        try:
+            _status, raw = _http_get(api_url, headers, 30)
+            q.put(('data', _json_loads(raw), False))
+        except Exception as e:
+            q.put(('error', e))
+
+    def execute(self, context):
+        prepared = self._prepare(context)
+        if prepared is None:
+            return {'CANCELLED'}
+        api_url, headers = prepared
+        data = _skp_wh_search_cache.get(api_url)
+        if data is None:
+            try:
+                _status, raw = _http_get(api_url, headers, 30)
+                data = _json_loads(raw)
+            except Exception as e:
+                self.report({'ERROR'}, f'API search failed: {e}')
+                return {'CANCELLED'}
+            data = self._cache_search(api_url, data)
+        else:
+            _skp_wh_search_cache.move_to_end(api_url)  # LRU touch
+        pcoll, thumb_jobs = self._show_results(context, data)
+        if pcoll is None:
+            return {'FINISHED'}
+        _skp_wh_load_thumbs(pcoll, thumb_jobs)
+        self._refresh_enum(context, select=True)
         return {'FINISHED'}
 
+    def invoke(self, context, event):
+        # Run from the UI the search and thumbnail downloads happen in the
+        # background, modal() loads the results as they arrive so Blender
+        # stays responsive
+        global _skp_wh_search_gen
+        prepared = self._prepare(context)
+        if prepared is None:
+            return {'CANCELLED'}
+        self._api_url, headers = prepared
+        _skp_wh_search_gen += 1
+        self._gen = _skp_wh_search_gen
+        self._queue = queue.Queue()
+        self._pool = None
+        self._pcoll = None
+        self._pending = 0
+        data = _skp_wh_search_cache.get(self._api_url)
+        if data is not None:
+            self._queue.put(('data', data, True))
+        else:
+            threading.Thread(target=self._fetch_worker, daemon=True,
+                             args=(self._queue, self._api_url, headers)).start()
+        self._area = context.area  # only Esc over this area cancels
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def _finish(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _over_area(self, event):
+        # Esc elsewhere in the UI belongs to whatever the user is doing there
+        try:
+            area = self._area
+            return (area is not None and
+                    area.x <= event.mouse_x < area.x + area.width and
+                    area.y <= event.mouse_y < area.y + area.height)
+        except ReferenceError:  # the area was closed meanwhile
+            return False
+
+    def modal(self, context, event):
+        if self._gen != _skp_wh_search_gen:
+            # Superseded by a newer search
+            self._finish(context)
+            return {'CANCELLED'}
+        if event.type == 'ESC' and event.value == 'PRESS' and self._over_area(event):
+            self._finish(context)
+            self.report({'INFO'}, '3D Warehouse search cancelled')
+            # Still pass Esc on, e.g. to leave the query text field
+            return {'CANCELLED', 'PASS_THROUGH'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        loaded = False
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == 'error':
+                self.report({'ERROR'}, f'API search failed: {item[1]}')
+                self._finish(context)
+                return {'CANCELLED'}
+            if item[0] == 'data':
+                # item[2] tells a cache hit, already compacted, from a fetch
+                if item[2]:
+                    data = item[1]
+                    if self._api_url in _skp_wh_search_cache:
+                        _skp_wh_search_cache.move_to_end(self._api_url)
+                else:
+                    data = self._cache_search(self._api_url, item[1])
+                self._pcoll, thumb_jobs = self._show_results(context, data)
+                if self._pcoll is None:
+                    self._finish(context)
+                    return {'FINISHED'}
+                self._refresh_enum(context, select=True)
+                if not thumb_jobs:
+                    self._finish(context)
+                    return {'FINISHED'}
+                self._pool = ThreadPoolExecutor(max_workers=_THUMB_WORKERS)
+                self._pending = len(thumb_jobs)
+                for job, future in zip(thumb_jobs, _skp_wh_submit_thumbs(self._pool, thumb_jobs)):
+                    if future is None:
+                        self._queue.put(('thumb', job, None))
+                    else:
+                        future.add_done_callback(
+                            lambda f, job=job, q=self._queue: q.put(('thumb', job, f)))
+            else:
+                _skp_wh_load_thumb(self._pcoll, item[1], item[2])
+                self._pending -= 1
+                loaded = True
+        if loaded:
+            self._refresh_enum(context, select=False)
+        if self._pool is not None and self._pending == 0:
+            self._finish(context)
+            return {'FINISHED'}
+        return {'PASS_THROUGH'}
+
 
 class SKPWH_OT_ImportResult(Operator):
     bl_idname = 'skp_wh.import_result'
@@ -1709,7 +2417,7 @@ class SKPWH_OT_ImportSelected(Operator):
             return {'CANCELLED'}
         res = _skp_wh_result_map[mid]
         try:
-            bpy.ops.skp_wh.import_result('INVOKE_DEFAULT', model_id=res['model_id'], model_name=res['model_name'])
+            bpy.ops.skp_wh.import_result('INVOKE_DEFAULT', model_id=res.model_id, model_name=res.model_name)
         except Exception as e:
             self.report({'ERROR'}, f'Import failed: {e}')
             return {'CANCELLED'}
@@ -1766,30 +2474,27 @@ class SKPWH_OT_LoadURL(Operator):
 
     @staticmethod
     def _extract_model_id(url: str):
-        pattern = r'https?://3dwarehouse\.sketchup\.com/model/([0-9a-fA-F\-]{30,36})/'
-        m = re.match(pattern, url.strip())
+        m = _MODEL_ID_RE.match(url.strip())
         if m:
             return m.group(1)
         return None
 
     @staticmethod
     def _extract_collection_id(url: str):
-        pattern = r'https?://3dwarehouse\.sketchup\.com/collection/([0-9a-fA-F\-]{30,36})/'
-        m = re.match(pattern, url.strip())
+        m = _COLLECTION_ID_RE.match(url.strip())
         if m:
             return m.group(1)
         return None
 
     def _load_collection(self, context, collection_id: str):
-        global _skp_wh_results, _skp_wh_result_map, _skp_wh_enum_items, _skp_wh_total_results, _skp_wh_total_pages
+        global _skp_wh_enum_items, _skp_wh_enum_key, _skp_wh_total_results, _skp_wh_total_pages
         # Reset page when loading a new collection
         context.window_manager.skp_wh_page = 0
         
         # Clear previous results first
-        _skp_wh_clear_previews()
-        _skp_wh_results = []
-        _skp_wh_result_map = {}
+        _skp_wh_reset_results()
         _skp_wh_enum_items = []
+        _skp_wh_enum_key = None
         
         # Don't clear selection yet - wait until after enum items are rebuilt
         
@@ -1821,32 +2526,20 @@ class SKPWH_OT_LoadURL(Operator):
         
         prefs = _skp_wh_get_prefs()
         cookie = prefs.warehouse_cookie.strip() if prefs and getattr(prefs, 'warehouse_cookie', '') else ''
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://3dwarehouse.sketchup.com/',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-site'
-        }
-        if cookie:
-            headers['Cookie'] = cookie
+        headers = {**_WH_COLLECTION_HEADERS, 'Cookie': cookie} if cookie else _WH_COLLECTION_HEADERS
         
         data = None
         for i, api_url in enumerate(api_urls):
             skp_log(f"Trying collection API URL {i+1}/{len(api_urls)}: {api_url}")
             try:
-                req = urllib.request.Request(api_url, headers=headers)
-                with urllib.request.urlopen(req, timeout=30) as resp:
-                    raw = resp.read().decode('utf-8', errors='replace')
-                    skp_log(f"Collection API response status: {resp.status}, content length: {len(raw)}")
-                    if len(raw.strip()) == 0:
-                        skp_log("Empty response received")
-                        continue
-                    data = json.loads(raw)
-                    skp_log(f"Successfully parsed JSON data with {len(data) if isinstance(data, (list, dict)) else 'unknown'} top-level items")
-                    break  # Success, use this data
+                status, raw = _http_get(api_url, headers, 30)
+                skp_log(f"Collection API response status: {status}, content length: {len(raw)}")
+                if len(raw.strip()) == 0:
+                    skp_log("Empty response received")
+                    continue
+                data = _json_loads(raw)
+                skp_log(f"Successfully parsed JSON data with {len(data) if isinstance(data, (list, dict)) else 'unknown'} top-level items")
+                break  # Success, use this data
             except urllib.error.HTTPError as he:
                 skp_log(f"HTTP Error for collection {collection_id} (URL {i+1}): {he.code} - {he.reason}")
                 if he.code == 400:
@@ -1872,18 +2565,15 @@ class SKPWH_OT_LoadURL(Operator):
             skp_log(f"Attempting to verify collection {collection_id} exists...")
             try:
                 collection_url = f"https://3dwarehouse.sketchup.com/collection/{collection_id}"
-                req = urllib.request.Request(collection_url, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                })
-                with urllib.request.urlopen(req, timeout=15) as resp:
-                    if resp.status == 200:
-                        page_content = resp.read().decode('utf-8', errors='replace')
-                        if 'collection' in page_content.lower() or 'model' in page_content.lower():
-                            skp_log(f"Collection page exists but API failed - collection may be empty or API changed")
-                        else:
-                            skp_log(f"Collection page exists but appears to be empty or inaccessible")
+                status, page = _http_get(collection_url, {'User-Agent': _WH_BROWSER_UA}, 15)
+                if status == 200:
+                    page_content = page.decode('utf-8', errors='replace')
+                    if 'collection' in page_content.lower() or 'model' in page_content.lower():
+                        skp_log(f"Collection page exists but API failed - collection may be empty or API changed")
                     else:
-                        skp_log(f"Collection page returned status {resp.status} - collection may not exist")
+                        skp_log(f"Collection page exists but appears to be empty or inaccessible")
+                else:
+                    skp_log(f"Collection page returned status {status} - collection may not exist")
             except Exception as e:
                 skp_log(f"Could not verify collection existence: {e}")
             
@@ -1893,9 +2583,10 @@ class SKPWH_OT_LoadURL(Operator):
         if not entries:
             raise RuntimeError('No models found in collection')
         
-        _skp_wh_clear_previews()
+        _skp_wh_reset_results()
         pcoll = _skp_wh_ensure_previews()
-        temp_dir = tempfile.mkdtemp(prefix='skp_wh_thumbs_')
+        temp_dir = _skp_wh_thumbs_dir()
+        thumb_jobs = []
         
         for ent in entries[:96]:  # Limit to 96 for performance
             mid = ent.get('id')
@@ -1906,88 +2597,68 @@ class SKPWH_OT_LoadURL(Operator):
             # Collect skp versions
             skp_versions = []
             for bname in (ent.get('binaryNames') or []):
-                if isinstance(bname, str) and re.fullmatch(r's\d+', bname):
-                    try:
-                        skp_versions.append(int(bname[1:]))
-                    except ValueError:
-                        pass
+                m = _SKP_VER_RE.match(bname) if isinstance(bname, str) else None
+                if m:
+                    skp_versions.append(int(m.group(1)))
             skp_versions.sort(reverse=True)
-            # Determine restricted
-            restricted = False
-            if skp_versions:
-                restricted_flags = []
-                for v in skp_versions:
-                    key = f's{v}'
-                    binfo = binaries.get(key)
-                    if isinstance(binfo, dict):
-                        c_url = binfo.get('contentUrl') or ''
-                        restricted_flags.append('/restricted/' in c_url)
-                if restricted_flags and all(restricted_flags):
-                    restricted = True
+            # Restricted (all available sXX have /restricted/ in contentUrl)
+            # and the file size of the highest version, in one pass
+            file_size = None
+            skp_filename = ''
+            got_size = False
+            any_binfo = False
+            all_restricted = True
+            for v in skp_versions:
+                binfo = binaries.get(f's{v}')
+                if not isinstance(binfo, dict):
+                    continue
+                any_binfo = True
+                if '/restricted/' not in (binfo.get('contentUrl') or ''):
+                    all_restricted = False
+                if not got_size:
+                    file_size = binfo.get('fileSize')
+                    skp_filename = binfo.get('originalFileName', '')
+                    got_size = bool(file_size)
+            restricted = any_binfo and all_restricted
             # Polygon count
             poly_count = None
             try:
                 poly_count = ent.get('attributes', {}).get('skp', {}).get('polygons', {}).get('value')
             except Exception:
                 poly_count = None
-            # File size
-            file_size = None
-            skp_filename = ''
-            if skp_versions:
-                for v in skp_versions:
-                    key = f's{v}'
-                    binfo = binaries.get(key)
-                    if isinstance(binfo, dict):
-                        file_size = binfo.get('fileSize')
-                        skp_filename = binfo.get('originalFileName', '')
-                        if file_size:
-                            break
-            def _fmt_size(num):
-                if not num:
-                    return '—'
-                for unit in ('B','KB','MB','GB'):
-                    if num < 1024 or unit == 'GB':
-                        return f"{num:.1f}{unit}" if unit != 'B' else f"{num}B"
-                    num /= 1024.0
             thumb_url, original_name = self._pick_thumbnail_binary(binaries)
-            icon_id = 0
-            if thumb_url:
-                try:
-                    ext = os.path.splitext(thumb_url.split('?',1)[0])[1]
-                    if ext.lower() not in ('.jpg', '.jpeg', '.png', '.webp'):
-                        ext = '.jpg'
-                    # Use deterministic preview key that includes the model id to avoid collisions
-                    preview_key = f"skp_wh_{mid}{ext}"
-                    thumb_path = os.path.join(temp_dir, preview_key)
-                    with urllib.request.urlopen(urllib.request.Request(thumb_url, headers={'User-Agent': 'Mozilla/5.0'}), timeout=20) as ir, open(thumb_path, 'wb') as outf:
-                        shutil.copyfileobj(ir, outf)
-                    pcoll.load(preview_key, thumb_path, 'IMAGE')
-                    icon_id = pcoll[preview_key].icon_id
-                except Exception:
-                    icon_id = 0
-            _skp_wh_results.append({
-                'model_id': mid,
-                'model_name': slug,
-                'display_name': name,
-                'model_url': model_url,
-                'icon_id': icon_id,
-                'skp_versions': skp_versions,
-                'restricted': restricted,
-                'has_glb': 'glb' in binaries,
-                'poly_count': poly_count,
-                'file_size': file_size,
-                'file_size_fmt': _fmt_size(file_size),
-                'skp_filename': skp_filename or ent.get('title') or ''
-            })
+            preview_key = ''
+            if thumb_url and mid:
+                # enforce extension
+                ext = os.path.splitext(thumb_url.split('?',1)[0])[1]
+                if ext.lower() not in ('.jpg', '.jpeg', '.png', '.webp'):
+                    ext = '.jpg'
+                # Use deterministic preview key that includes the model id to avoid collisions
+                preview_key = f"skp_wh_{mid}{ext}"
+            _skp_wh_results.append(WhResult(
+                model_id=mid,
+                model_name=slug,
+                display_name=name,
+                model_url=model_url,
+                icon_id=0,
+                skp_versions=tuple(skp_versions),
+                restricted=restricted,
+                has_glb='glb' in binaries,
+                poly_count=poly_count,
+                file_size=file_size,
+                file_size_fmt=_fmt_size(file_size),
+                skp_filename=skp_filename or ent.get('title') or '',
+                preview_key=preview_key
+            ))
+            if preview_key:
+                thumb_jobs.append((_skp_wh_results[-1], preview_key, thumb_url,
+                                   os.path.join(temp_dir, preview_key)))
             if mid:
-                _skp_wh_result_map[mid] = _skp_wh_results[-1]
+                _skp_wh_remember_result(_skp_wh_results[-1])
+        _skp_wh_load_thumbs(pcoll, thumb_jobs)
         
         # Rebuild enum items
-        _skp_wh_enum_items = []
-        for r in _skp_wh_results:
-            if r['model_id']:
-                name_disp = (r['display_name'][:32] + ('…' if len(r['display_name'])>32 else ''))
-                _skp_wh_enum_items.append((r['model_id'], name_disp, r['model_url'], r['icon_id'], len(_skp_wh_enum_items)))
+        _skp_wh_rebuild_enum_items()
         
         # After rebuilding enum items, select the first item (if any)
         # so the enum has a valid value and the UI can display thumbnails.
@@ -2022,7 +2693,7 @@ class SKPWH_OT_LoadURL(Operator):
         # Debug: log first few entries for verification
         if LOGS or DEBUG:
             try:
-                sample = [_skp_wh_results[i]['model_id'] + ':' + _skp_wh_results[i]['display_name'] for i in range(min(6, len(_skp_wh_results)))]
+                sample = [_skp_wh_results[i].model_id + ':' + _skp_wh_results[i].display_name for i in range(min(6, len(_skp_wh_results)))]
             except Exception:
                 sample = []
             skp_log(f"Collection rebuild: total={len(_skp_wh_results)}, sample={sample}")
@@ -2038,18 +2709,17 @@ class SKPWH_OT_LoadURL(Operator):
         return []
 
     def _slugify(self, name: str):
-        slug = re.sub(r'[^a-zA-Z0-9\- _]+', '', (name or 'Model')).strip().replace(' ', '-')
+        slug = _SLUG_STRIP_RE.sub('', (name or 'Model')).strip().replace(' ', '-')
         return slug[:60] if slug else 'Model'
 
     def _pick_thumbnail_binary(self, binaries: dict):
-        primary_order = ['bot_lt_wp', 'bot_lt', 'bot_st_wp', 'bot_st', 'bot_tt_wp', 'bot_tt']
-        ao_order = ['bot_lt_wp_ao', 'bot_lt_ao', 'bot_st_wp_ao', 'bot_st_ao', 'bot_tt_wp_ao', 'bot_tt_ao']
-        for key in primary_order + ao_order:
-            entry = binaries.get(key)
-            if isinstance(entry, dict):
-                url = entry.get('url') or entry.get('contentUrl')
-                if url:
-                    return url, entry.get('originalFileName', '')
+        # Smallest image at least _THUMB_SIZE wide, else the widest one;
+        # entries without a width keep _THUMB_PRIORITY order
+        entry = min((e for e in map(binaries.get, _THUMB_PRIORITY)
+                     if isinstance(e, dict) and (e.get('url') or e.get('contentUrl'))),
+                    key=_thumb_width_rank, default=None)
+        if entry:
+            return entry.get('url') or entry.get('contentUrl'), entry.get('originalFileName', '')
         for k, entry in binaries.items():
             if isinstance(entry, dict):
                 ext = (entry.get('ext') or '').lower()
@@ -2111,7 +2781,7 @@ class VIEW3D_PT_SketchupWarehouseBrowser(bpy.types.Panel):
                     skp_log(f"DEBUG: enum_items={len(_skp_wh_enum_items)}, results={len(_skp_wh_results)}")
                     # show first few enum item ids
                     ei_sample = [e[0] for e in _skp_wh_enum_items[:6]]
-                    rr_sample = [r['model_id'] for r in _skp_wh_results[:6]]
+                    rr_sample = [r.model_id for r in _skp_wh_results[:6]]
                     skp_log(f"DEBUG: enum_sample={ei_sample}")
                     skp_log(f"DEBUG: results_sample={rr_sample}")
                 except Exception:
@@ -2121,18 +2791,18 @@ class VIEW3D_PT_SketchupWarehouseBrowser(bpy.types.Panel):
             if sel and sel in _skp_wh_result_map:
                 r = _skp_wh_result_map[sel]
                 box = layout.box()
-                box.label(text=r.get('display_name',''))
+                box.label(text=r.display_name)
                 stats = []
-                if r.get('skp_versions'):
-                    stats.append('s'+str(r['skp_versions'][0]))
-                if r.get('file_size_fmt'):
-                    stats.append(r['file_size_fmt'])
-                if r.get('poly_count') is not None:
-                    stats.append(f"{r['poly_count']} tris")
+                if r.skp_versions:
+                    stats.append('s'+str(r.skp_versions[0]))
+                if r.file_size_fmt:
+                    stats.append(r.file_size_fmt)
+                if r.poly_count is not None:
+                    stats.append(f"{r.poly_count} tris")
                 box.label(text=' | '.join(stats) if stats else '—')
-                if r.get('restricted'):
+                if r.restricted:
                     box.label(text='Restricted model (cookie may be required)', icon='LOCKED')
-                elif not r.get('skp_versions') and r.get('has_glb'):
+                elif not r.skp_versions and r.has_glb:
                     box.label(text='GLB only (no SKP versions)', icon='FILE_3D')
                 box.operator('skp_wh.import_selected', icon='IMPORT')
         else:
@@ -2144,28 +2814,28 @@ class VIEW3D_PT_SketchupWarehouseBrowser(bpy.types.Panel):
                 icon_col = col.column()
                 icon_col.scale_x = scale
                 icon_col.scale_y = scale
-                title = item.get('display_name','')
-                if item['icon_id']:
-                    op = icon_col.operator('skp_wh.import_result', text='', icon_value=item['icon_id'])
+                title = item.display_name
+                if item.icon_id:
+                    op = icon_col.operator('skp_wh.import_result', text='', icon_value=item.icon_id)
                 else:
                     op = icon_col.operator('skp_wh.import_result', text='Import')
-                op.model_id = item['model_id']
-                op.model_name = item['model_name']
+                op.model_id = item.model_id
+                op.model_name = item.model_name
                 info_col = col.column(align=True)
                 name_line = (title[:40] + ('…' if len(title) > 40 else ''))
                 info_col.label(text=name_line)
                 stats = []
-                if item.get('skp_versions'):
-                    stats.append(f"s{item['skp_versions'][0]}")
-                if item.get('file_size_fmt'):
-                    stats.append(item['file_size_fmt'])
-                if item.get('poly_count') is not None:
-                    stats.append(f"{item['poly_count']} tris")
+                if item.skp_versions:
+                    stats.append(f"s{item.skp_versions[0]}")
+                if item.file_size_fmt:
+                    stats.append(item.file_size_fmt)
+                if item.poly_count is not None:
+                    stats.append(f"{item.poly_count} tris")
                 info_col.label(text=' | '.join(stats) if stats else '—')
                 flags_row = info_col.row(align=True)
-                if item.get('restricted'):
+                if item.restricted:
                     flags_row.label(text='Restricted', icon='LOCKED')
-                elif not item.get('skp_versions') and item.get('has_glb'):
+                elif not item.skp_versions and item.has_glb:
                     flags_row.label(text='GLB only', icon='FILE_3D')
 
 
@@ -2200,6 +2870,8 @@ def register():
     for c in classes_to_register_extra:
         bpy.utils.register_class(c)
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
+    _skp_wh_register_props()
+    _skp_wh_evict_thumbs()
     # bpy.utils.register_class(ExportSKP)
     # bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
 
@@ -2210,11 +2882,17 @@ def unregister():
     for c in reversed(classes_to_register_extra):
         bpy.utils.unregister_class(c)
     bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
+    _skp_wh_unregister_props()
     # bpy.utils.unregister_class(ExportSKP)
     # bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
     bpy.utils.unregister_class(SketchupAddonPreferences)
-    _skp_wh_clear_previews()
+    _skp_wh_reset_results()
+    _skp_wh_result_map.clear()
     global _skp_wh_previews
-    if _skp_wh_previews:
+    if _skp_wh_previews is not None:
         previews.remove(_skp_wh_previews)
         _skp_wh_previews = None
+    global _http_session
+    if _http_session is not None:
+        _http_session.close()
+        _http_session = None
@@ -41,7 +41,7 @@ cdef extern from "SketchUpAPI/model/model.h":
         SUModelVersion_SU2017
 
     SU_RESULT SUModelCreate(SUModelRef* model)
-    SU_RESULT SUModelCreateFromFile(SUModelRef* model, const char* file_path)
+    SU_RESULT SUModelCreateFromFile(SUModelRef* model, const char* file_path) nogil
     SU_RESULT SUModelRelease(SUModelRef* model)
     #SUModelRef SUModelFromExisting(uintptr_t data)
     SU_RESULT SUModelGetEntities(SUModelRef model, SUEntitiesRef* entities)
@@ -5,6 +5,57 @@ Test script for 3D Warehouse collection loading
 import urllib.request
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def _probe(url, headers):
+    """Fetch one candidate URL, return the report lines to print for it"""
+    out = []
+    try:
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            content = resp.read()
+            out.append(f"Status: {resp.status}")
+            out.append(f"Content length (bytes): {len(content)}")
+
+            if len(content.strip()) == 0:
+                out.append("Empty response")
+                return out
+
+            try:
+                data = json.loads(content)
+                out.append(f"JSON parsed successfully. Type: {type(data)}")
+                if isinstance(data, dict):
+                    out.append(f"Keys: {list(data.keys())}")
+                    for key in ['entries', 'entities', 'items', 'results']:
+                        if key in data and isinstance(data[key], list):
+                            out.append(f"Found {len(data[key])} items in '{key}'")
+                            if data[key]:
+                                out.append(f"First item keys: {list(data[key][0].keys()) if isinstance(data[key][0], dict) else 'Not a dict'}")
+                            break
+                elif isinstance(data, list):
+                    out.append(f"List with {len(data)} items")
+                    if data:
+                        out.append(f"First item keys: {list(data[0].keys()) if isinstance(data[0], dict) else 'Not a dict'}")
+                else:
+                    out.append(f"Unexpected data type: {type(data)}")
+
+            except json.JSONDecodeError as e:
+                out.append(f"JSON decode error: {e}")
+                out.append(f"First 500 chars: {content[:500].decode('utf-8', errors='replace')}")
+
+    except urllib.error.HTTPError as e:
+        out.append(f"HTTP Error: {e.code} - {e.reason}")
+        if e.code == 400:
+            try:
+                error_content = e.read().decode('utf-8', errors='replace')
+                out.append(f"Error details: {error_content}")
+            except:
+                out.append("Could not read error response")
+    except Exception as e:
+        out.append(f"Error: {type(e).__name__}: {e}")
+    return out
+
 
 def test_collection_api(collection_id):
     """Test various API endpoints for loading a collection"""
@@ -26,51 +77,14 @@ def test_collection_api(collection_id):
         'Referer': 'https://3dwarehouse.sketchup.com/',
     }
 
-    for i, url in enumerate(test_urls):
-        print(f"\nTest {i+1}: {url}")
-        try:
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                content = resp.read().decode('utf-8', errors='replace')
-                print(f"Status: {resp.status}")
-                print(f"Content length: {len(content)}")
-
-                if len(content.strip()) == 0:
-                    print("Empty response")
-                    continue
-
-                try:
-                    data = json.loads(content)
-                    print(f"JSON parsed successfully. Type: {type(data)}")
-                    if isinstance(data, dict):
-                        print(f"Keys: {list(data.keys())}")
-                        for key in ['entries', 'entities', 'items', 'results']:
-                            if key in data and isinstance(data[key], list):
-                                print(f"Found {len(data[key])} items in '{key}'")
-                                if data[key]:
-                                    print(f"First item keys: {list(data[key][0].keys()) if isinstance(data[key][0], dict) else 'Not a dict'}")
-                                break
-                    elif isinstance(data, list):
-                        print(f"List with {len(data)} items")
-                        if data:
-                            print(f"First item keys: {list(data[0].keys()) if isinstance(data[0], dict) else 'Not a dict'}")
-                    else:
-                        print(f"Unexpected data type: {type(data)}")
-
-                except json.JSONDecodeError as e:
-                    print(f"JSON decode error: {e}")
-                    print(f"First 500 chars: {content[:500]}")
-
-        except urllib.error.HTTPError as e:
-            print(f"HTTP Error: {e.code} - {e.reason}")
-            if e.code == 400:
-                try:
-                    error_content = e.read().decode('utf-8', errors='replace')
-                    print(f"Error details: {error_content}")
-                except:
-                    print("Could not read error response")
-        except Exception as e:
-            print(f"Error: {type(e).__name__}: {e}")
+    # All candidates are probed at once, each report is printed as it lands
+    with ThreadPoolExecutor(max_workers=len(test_urls)) as ex:
+        futures = {ex.submit(_probe, url, headers): (i, url)
+                   for i, url in enumerate(test_urls)}
+        for future in as_completed(futures):
+            i, url = futures[future]
+            print(f"\nTest {i+1}: {url}")
+            print("\n".join(future.result()))
 
     # Test if collection page exists
     print("\nTesting collection page existence...")
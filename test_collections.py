@@ -1,21 +1,27 @@
 import urllib.request, json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 headers={'User-Agent':'Mozilla/5.0','Accept':'application/json','Referer':'https://3dwarehouse.sketchup.com/'}
 collection_id='226feeecf3660eff676bdfa79a976821'
 urls=[
  f"https://3dwarehouse.sketchup.com/warehouse/v1.0/entities?fq=parentIds=={collection_id}&contentType=3dw&show=all&showBinaryMetadata=true&showAttributes=true",
  f"https://embed-3dwarehouse.sketchup.com/warehouse/v1.0/entities?collectionId={collection_id}&contentType=3dw&showBinaryAttributes=true&showBinaryMetadata=true&showAttributes=true&show=all&recordEvent=false",
 ]
-for u in urls:
-    print('\nTesting:',u)
+def probe(u):
+    out=['\nTesting: '+u]
     try:
         req=urllib.request.Request(u, headers=headers)
         with urllib.request.urlopen(req, timeout=30) as r:
-            raw=r.read().decode('utf-8',errors='replace')
-            print('Status', r.status, 'len', len(raw))
+            raw=r.read()
+            out.append(f'Status {r.status} len {len(raw)}')
             try:
                 d=json.loads(raw)
-                print('Top keys:', list(d.keys()) if isinstance(d, dict) else type(d))
+                out.append(f'Top keys: {list(d.keys()) if isinstance(d, dict) else type(d)}')
             except Exception as e:
-                print('JSON failed',e)
+                out.append(f'JSON failed {e}')
     except Exception as e:
-        print('Failed', type(e).__name__, e)
+        out.append(f'Failed {type(e).__name__} {e}')
+    return '\n'.join(out)
+# Probe every URL at once, print each as it finishes
+with ThreadPoolExecutor(max_workers=len(urls)) as ex:
+    for f in as_completed([ex.submit(probe, u) for u in urls]):
+        print(f.result())
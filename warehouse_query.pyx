@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+# Compiled versions of the 3D Warehouse search helpers in
+# debug_search_test.py (which keeps the pure Python code as fallback).
+
+import json
+
+cdef unsigned char _safe[256]
+cdef const char* _hex = b"0123456789ABCDEF"
+
+for _b in range(256):
+    _safe[_b] = _b in b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.-~/'
+
+
+cpdef str quote(str text):
+    """
+    :param text: query text to percent-encode
+    :return: same result as urllib.parse.quote(text) (safe='/')
+    """
+    cdef bytes raw = text.encode('UTF-8')
+    cdef Py_ssize_t n = len(raw)
+    if n == 0:
+        return ''
+    cdef const unsigned char[::1] src = raw
+    cdef bytearray out = bytearray(n * 3)
+    cdef unsigned char[::1] dst = out
+    cdef Py_ssize_t i, j = 0
+    cdef unsigned char c
+    for i in range(n):
+        c = src[i]
+        if _safe[c]:
+            dst[j] = c
+            j += 1
+        else:
+            dst[j] = 37  # %
+            dst[j + 1] = _hex[c >> 4]
+            dst[j + 2] = _hex[c & 15]
+            j += 3
+    return out[:j].decode('ascii')
+
+
+cpdef str build_url(str prefix, str query, Py_ssize_t offset):
+    return "{}&q={}&offset={}".format(prefix, quote(query), offset)
+
+
+cdef inline Py_ssize_t _skip_ws(const unsigned char[::1] buf, Py_ssize_t i,
+                                Py_ssize_t n) nogil:
+    while i < n and (buf[i] == 32 or buf[i] == 9 or buf[i] == 10 or
+                     buf[i] == 13):
+        i += 1
+    return i
+
+
+cdef inline Py_ssize_t _string_end(const unsigned char[::1] buf, Py_ssize_t i,
+                                   Py_ssize_t n) nogil:
+    # Index of the quote closing the string that opens at buf[i], or -1
+    i += 1
+    while i < n:
+        if buf[i] == 92:  # backslash escapes the next byte
+            i += 2
+            continue
+        if buf[i] == 34:
+            return i
+        i += 1
+    return -1
+
+
+cdef Py_ssize_t _skip_value(const unsigned char[::1] buf, Py_ssize_t i,
+                            Py_ssize_t n) nogil:
+    # Index just past the JSON value starting at buf[i], or -1
+    cdef Py_ssize_t depth = 0
+    cdef unsigned char c
+    i = _skip_ws(buf, i, n)
+    if i >= n:
+        return -1
+    c = buf[i]
+    if c == 34:
+        i = _string_end(buf, i, n)
+        return i + 1 if i >= 0 else -1
+    if c != 123 and c != 91:
+        # Scalars cannot contain ',' or '}', so the next one ends the value
+        while i < n and buf[i] != 44 and buf[i] != 125:
+            i += 1
+        return i if i < n else -1
+    while i < n:
+        c = buf[i]
+        if c == 34:
+            i = _string_end(buf, i, n)
+            if i < 0:
+                return -1
+        elif c == 123 or c == 91:
+            depth += 1
+        elif c == 125 or c == 93:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return -1
+
+
+cpdef object scan_top_keys(const unsigned char[::1] buf):
+    """
+    :param buf: raw JSON response bytes
+    :return: list of top-level object keys, or None if buf does not look
+             like a well formed object
+    """
+    cdef Py_ssize_t n = buf.shape[0]
+    cdef Py_ssize_t i, end
+    cdef bytes key
+    keys = []
+    i = _skip_ws(buf, 0, n)
+    if i >= n or buf[i] != 123:
+        return None
+    i = _skip_ws(buf, i + 1, n)
+    if i < n and buf[i] == 125:
+        return keys if _skip_ws(buf, i + 1, n) == n else None
+    while True:
+        if i >= n or buf[i] != 34:
+            return None
+        end = _string_end(buf, i, n)
+        if end < 0:
+            return None
+        key = bytes(buf[i + 1:end])
+        if b'\\' in key:
+            keys.append(json.loads(bytes(buf[i:end + 1])))
+        else:
+            keys.append(key.decode('UTF-8'))
+        i = _skip_ws(buf, end + 1, n)
+        if i >= n or buf[i] != 58:  # :
+            return None
+        i = _skip_value(buf, i + 1, n)
+        if i < 0:
+            return None
+        i = _skip_ws(buf, i, n)
+        if i >= n:
+            return None
+        if buf[i] == 125:
+            # Anything but whitespace after the object is not valid JSON
+            return keys if _skip_ws(buf, i + 1, n) == n else None
+        if buf[i] != 44:
+            return None
+        i = _skip_ws(buf, i + 1, n)